@@ -0,0 +1,272 @@
+# Functions to read pokemon reveals out of Pokemon Showdown battle logs/protocol dumps
+import gzip
+import json
+import os
+import re
+import time
+from typing import NamedTuple, Optional
+
+# Protocol messages which put a pokemon on the field (or on team preview)
+REVEAL_MESSAGES = {"switch", "drag", "replace", "poke"}
+BATTLE_END_MESSAGES = {"win", "tie"}
+
+
+def parse_reveal(line: str, messages=REVEAL_MESSAGES):
+    """
+    Parse a single protocol line such as |switch|p2a: Nickname|Tyranitar, L100, M|100/100
+    :param messages: Protocol message types that count as a reveal
+    :return: (side, species) e.g. ("p2", "Tyranitar"), or None if the line isn't a reveal
+    """
+    parts = line.rstrip("\r\n").split("|")
+    if len(parts) < 4 or parts[0] != "" or parts[1] not in messages:
+        return None
+    # Details are "Species, L50, F, shiny" and positions are "p2a: Nickname" or "p2"
+    side = parts[2][:2]
+    species = parts[3].split(",")[0].strip()
+    if not side.startswith("p") or species == "":
+        return None
+    return side, species
+
+
+def to_id(name: str) -> str:
+    """Showdown style id of a name or format, e.g. [Gen 3] OU becomes gen3ou"""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def iter_battle_teams(lines, format_id=None):
+    """
+    Group the reveals in a stream of protocol lines into teams.
+    Handles several battles in one stream, separated by >room-id lines (as in protocol
+    dumps) or by the end of a battle.
+    :param lines: Iterable of protocol lines
+    :param format_id: Only yield teams from battles with this format id (e.g. "gen3ou")
+    :return: Generator of sets of species, one per side per battle
+    """
+    teams = {}
+    formats = {}
+    room = ""
+    for line in lines:
+        if line.startswith(">"):
+            room = line[1:].strip()
+            continue
+        reveal = parse_reveal(line)
+        if reveal is not None:
+            teams.setdefault(room, {}).setdefault(reveal[0], set()).add(reveal[1])
+            continue
+        parts = line.rstrip("\r\n").split("|")
+        if len(parts) >= 3 and parts[1] == "tier":
+            formats[room] = to_id(parts[2])
+        elif len(parts) >= 2 and parts[1] in BATTLE_END_MESSAGES:
+            yield from finish_battle(
+                teams.pop(room, {}), formats.pop(room, None), format_id
+            )
+
+    for room, sides in teams.items():
+        yield from finish_battle(sides, formats.get(room), format_id)
+
+
+def finish_battle(sides, battle_format, format_id):
+    if format_id is not None and battle_format != format_id:
+        return
+    for team in sides.values():
+        yield team
+
+
+def iter_replay_lines(path):
+    """
+    Stream protocol lines out of a replay file without reading it all into memory.
+    Supports raw logs (.log/.txt), Showdown replay JSON (.json) and one replay per line
+    JSON (.jsonl), each optionally gzipped.
+    Every replay from a JSON file is preceded by a >room-id line so battles stay apart.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    name = path[:-3] if path.endswith(".gz") else path
+    with opener(path, mode="rt", encoding="utf-8", errors="replace") as f:
+        if name.endswith(".jsonl"):
+            for number, line in enumerate(f):
+                if line.strip() == "":
+                    continue
+                yield from replay_json_lines(json.loads(line), f"{path}:{number}")
+        elif name.endswith(".json"):
+            yield from replay_json_lines(json.load(f), path)
+        else:
+            yield f">{path}\n"
+            yield from f
+
+
+def replay_json_lines(replay: dict, default_room: str):
+    yield f">{replay.get('id', default_room)}\n"
+    if "formatid" in replay:
+        yield f"|tier|{replay['formatid']}\n"
+    yield from replay.get("log", "").splitlines()
+
+
+def find_replay_files(paths):
+    """Expand files and directories (searched recursively) into replay files"""
+    extensions = (".log", ".txt", ".json", ".jsonl")
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for directory, _, files in os.walk(path):
+            for file in sorted(files):
+                if file.removesuffix(".gz").endswith(extensions):
+                    yield os.path.join(directory, file)
+
+
+class LogEvent(NamedTuple):
+    # species is None when a new battle starts, so its earlier reveals no longer apply
+    battle: str
+    species: Optional[str]
+
+
+class BattleLogWatcher:
+    """
+    Follows Showdown battle logs/protocol dumps as they are written and reports each
+    newly revealed opposing pokemon. Every poll only reads the bytes appended since the
+    last one, and a file that is replaced or truncated (log rotation) is read again from
+    its start. Protocol dumps holding several rooms (>battle-... lines) are split into
+    one battle per room, otherwise each file is one battle.
+    """
+
+    def __init__(
+        self,
+        paths,
+        your_name=None,
+        recent_seconds=600,
+        read_limit=2**20,
+        rescan_seconds=1.0,
+    ):
+        """
+        :param paths: Log files and/or directories whose log files should be followed
+        :param your_name: Your Showdown username, used to tell which side is the
+            opponent. Without it (or if it isn't found) p2 is assumed to be the opponent
+        :param recent_seconds: Files already present that were modified longer ago than
+            this are assumed finished and only followed from their current end
+        :param read_limit: Maximum bytes read from one file per poll
+        :param rescan_seconds: How often directories are listed again to find new
+            logs. In between, only logs written to in the last recent_seconds are
+            checked, so a folder full of old battles doesn't slow every poll down
+        """
+        self.paths = paths
+        self.your_id = to_id(your_name) if your_name else None
+        self.read_limit = read_limit
+        self.recent_seconds = recent_seconds
+        self.rescan_seconds = rescan_seconds
+        self.log_files = []
+        self.last_scan = None
+        self.files = {}
+        self.battles = {}
+        self.last_lag_ms = None
+        self.start_time = time.time() - recent_seconds
+        self.started = False
+
+    def poll(self):
+        """:return: List of LogEvents found since the last poll"""
+        events = []
+        for path in self.find_log_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            tailed = self.files.get(path)
+            if (
+                tailed is None
+                or tailed["inode"] != (stat.st_dev, stat.st_ino)
+                or stat.st_size < tailed["offset"]
+            ):
+                if tailed is not None and path in self.battles:
+                    # Rotated/truncated, so whatever follows is a new battle
+                    if len(self.battles.pop(path)["revealed"]) > 0:
+                        events.append(LogEvent(path, None))
+                # Start from the beginning unless the file was already finished
+                # before watching started
+                skip = not self.started and stat.st_mtime < self.start_time
+                tailed = {
+                    "inode": (stat.st_dev, stat.st_ino),
+                    "offset": stat.st_size if skip else 0,
+                    "partial": b"",
+                    "room": path,
+                }
+                self.files[path] = tailed
+            tailed["mtime"] = stat.st_mtime
+            if stat.st_size == tailed["offset"]:
+                continue
+
+            try:
+                with open(path, "rb") as f:
+                    f.seek(tailed["offset"])
+                    data = f.read(min(stat.st_size - tailed["offset"], self.read_limit))
+            except OSError:
+                # Rotated or deleted since the stat, the next poll sees the change
+                continue
+            tailed["offset"] += len(data)
+            # Only whole lines are parsed, the rest waits for the next poll
+            lines = (tailed["partial"] + data).split(b"\n")
+            tailed["partial"] = lines.pop()
+            for line in lines:
+                events.extend(self.parse_line(tailed, line.decode("utf-8", "replace")))
+            self.last_lag_ms = (time.time() - stat.st_mtime) * 1000
+
+        self.started = True
+        return events
+
+    def parse_line(self, tailed, line):
+        if line.startswith(">"):
+            tailed["room"] = line[1:].strip()
+            return []
+        battle = self.battles.setdefault(
+            tailed["room"], {"opponent": "p2", "revealed": set()}
+        )
+        parts = line.rstrip("\r").split("|")
+        if len(parts) < 2:
+            return []
+
+        if parts[1] == "player" and len(parts) >= 4 and self.your_id is not None:
+            if to_id(parts[3]) == self.your_id:
+                battle["opponent"] = "p2" if parts[2] == "p1" else "p1"
+        elif parts[1] == "start" or parts[1:3] == ["init", "battle"]:
+            if len(battle["revealed"]) > 0:
+                battle["revealed"] = set()
+                return [LogEvent(tailed["room"], None)]
+        else:
+            reveal = parse_reveal(line, messages={"switch", "drag"})
+            if (
+                reveal is not None
+                and reveal[0] == battle["opponent"]
+                and reveal[1] not in battle["revealed"]
+            ):
+                battle["revealed"].add(reveal[1])
+                return [LogEvent(tailed["room"], reveal[1])]
+        return []
+
+    def find_log_files(self):
+        now = time.time()
+        if self.last_scan is None or now - self.last_scan >= self.rescan_seconds:
+            self.log_files = list(self.scan_log_files())
+            self.last_scan = now
+            return self.log_files
+        return [
+            path
+            for path in self.log_files
+            if path not in self.files
+            or self.files[path]["mtime"] >= now - self.recent_seconds
+        ]
+
+    def scan_log_files(self):
+        for path in self.paths:
+            if os.path.isfile(path):
+                yield path
+            elif os.path.isdir(path):
+                try:
+                    with os.scandir(path) as entries:
+                        log_files = [
+                            entry.path
+                            for entry in entries
+                            if entry.is_file() and entry.name.endswith((".log", ".txt"))
+                        ]
+                except OSError:
+                    # Removed or unmounted since the isdir check, the folder is
+                    # tried again on the next rescan
+                    continue
+                yield from log_files
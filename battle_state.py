@@ -0,0 +1,52 @@
+# Containers for the format data shared by every battle and the state of each battle
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from cooccurrence_index import CooccurrenceIndex
+
+TEAM_SIZE = 6
+
+
+@dataclass(frozen=True)
+class FormatModel:
+    """
+    Everything loaded for a single format. Built once per format selection and shared
+    (never copied or modified) by all open battles
+    """
+
+    counts: pd.DataFrame
+    raw_rates: pd.Series
+    teammates: pd.DataFrame
+    checks: pd.DataFrame
+    check_deviations: pd.DataFrame
+    # Optional higher order teammate counts built from local replays
+    cooccurrence: Optional["CooccurrenceIndex"] = None
+
+
+@dataclass
+class BattleState:
+    """
+    What has been entered for one battle, i.e. the contents of the 12 entry fields and
+    the checked/countered buttons. Only holds names so any number of battles stay cheap
+    """
+
+    your_pokemon: list[str] = field(default_factory=lambda: [""] * TEAM_SIZE)
+    your_checked: list[bool] = field(default_factory=lambda: [False] * TEAM_SIZE)
+    opposing_pokemon: list[str] = field(default_factory=lambda: [""] * TEAM_SIZE)
+    # Saved rankings (see RankedResultsModel.save_state) and the opponent list they
+    # were calculated for, so Since Reveal deltas survive switching tabs
+    result_states: tuple = field(default=(None, None), compare=False)
+    last_opposing_pokemon: list[str] = field(default_factory=list, compare=False)
+
+    def clear_opponent(self):
+        self.opposing_pokemon = [""] * TEAM_SIZE
+        self.your_checked = [False] * TEAM_SIZE
+        self.result_states = (None, None)
+        self.last_opposing_pokemon = []
+
+    def reset(self):
+        self.clear_opponent()
+        self.your_pokemon = [""] * TEAM_SIZE
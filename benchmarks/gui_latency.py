@@ -0,0 +1,220 @@
+# Headless end-to-end latency benchmark for the MainWindow
+# Drives the real window under the Qt offscreen platform with scripted battle sessions
+# and reports per-event latency percentiles along with handler call counts.
+# The formats used must already be downloaded (or downloadable) just like in the GUI.
+#
+# Example:
+#   python benchmarks/gui_latency.py --format 3,ou,1500 --switch-format 2,ou,0
+import argparse
+import functools
+import inspect
+import os
+import sys
+import time
+from collections import defaultdict
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt6.QtGui import QAction
+from PyQt6.QtTest import QTest
+from PyQt6.QtWidgets import QApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import unrevealed_predictor  # noqa: E402
+from unrevealed_predictor import TEAM_SIZE, MainWindow  # noqa: E402
+
+# Everything a keystroke can pass through on its way to the display
+INSTRUMENTED_HANDLERS = [
+    "update_opponent_team_list",
+    "update_checked_list",
+    "update_most_likely",
+    "update_lookahead",
+    "update_pokemon_image",
+    "clear_opponent",
+    "set_format",
+    "switch_battle",
+]
+
+
+class HandlerStats:
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def wrap(self, name, function):
+        # PyQt drops signal arguments a slot can't take, but can't see through the
+        # wrapper, so trim them here instead (e.g. clicked(bool) -> update_checked_list)
+        parameters = inspect.signature(function).parameters.values()
+        if any(p.kind == p.VAR_POSITIONAL for p in parameters):
+            max_args = None
+        else:
+            max_args = sum(
+                p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+                for p in parameters
+            )
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args[:max_args], **kwargs)
+            finally:
+                self.calls[name] += 1
+                self.seconds[name] += time.perf_counter() - start
+
+        return timed
+
+
+def instrument(stats):
+    """
+    Wrap the window's handlers before it is built so the signal connections made in
+    MainWindow.__init__ pick up the counting versions
+    """
+    for name in INSTRUMENTED_HANDLERS:
+        setattr(MainWindow, name, stats.wrap(name, getattr(MainWindow, name)))
+    for name in ("calculate_likelihoods", "calculate_likelihood_intervals"):
+        setattr(
+            unrevealed_predictor,
+            name,
+            stats.wrap(name, getattr(unrevealed_predictor, name)),
+        )
+
+
+def parse_format(text):
+    generation, tier, elo_floor = text.split(",")
+    return int(generation), tier, elo_floor
+
+
+class BattleSession:
+    """Scripted battles against the window, recording how long each event takes"""
+
+    def __init__(self, app, window, rng):
+        self.app = app
+        self.window = window
+        self.rng = rng
+        self.latencies = defaultdict(list)
+        self.clear_opponent_action = next(
+            action
+            for action in window.findChildren(QAction)
+            if action.text() == "&Clear Opponent"
+        )
+
+    def timed(self, event, function, *args):
+        start = time.perf_counter()
+        function(*args)
+        # Flush the resulting repaints so the display cost is included
+        self.app.processEvents()
+        self.latencies[event].append(time.perf_counter() - start)
+
+    def sample_team(self):
+        # Weight by usage so the sessions look like real ladder teams
+        counts = self.window.format_model.counts["Raw"]
+        return list(
+            self.rng.choice(
+                counts.index, size=TEAM_SIZE, replace=False, p=counts / counts.sum()
+            )
+        )
+
+    def type_name(self, event, entry, name):
+        for character in name:
+            self.timed(event, QTest.keyClicks, entry, character)
+
+    def play_battle(self):
+        for entry, name in zip(self.window.your_pokemon_entry, self.sample_team()):
+            if entry.text() != name:
+                entry.clear()
+                self.type_name("type your pokemon", entry, name)
+
+        # Reveal the opponent one at a time, reacting with checks along the way
+        for i, name in enumerate(self.sample_team()[: self.rng.integers(1, TEAM_SIZE)]):
+            self.type_name("type opponent", self.window.opposing_pokemon_entry[i], name)
+            if self.rng.random() < 0.5:
+                button = self.window.your_pokemon_checkboxes[
+                    self.rng.integers(TEAM_SIZE)
+                ]
+                self.timed("toggle checked", button.click)
+
+        self.timed("clear opponent", self.clear_opponent_action.trigger)
+
+
+def percentile_table(latencies):
+    lines = [
+        f"{'Event':<20}{'Count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    ]
+    for event, samples in latencies.items():
+        samples_ms = np.array(samples) * 1000
+        p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+        lines.append(
+            f"{event:<20}{len(samples_ms):>8}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}"
+            f"{samples_ms.max():>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def handler_table(stats):
+    lines = [f"{'Handler':<32}{'Calls':>8}{'Total ms':>12}{'Mean ms':>10}"]
+    for name, calls in sorted(stats.calls.items(), key=lambda item: -item[1]):
+        total_ms = stats.seconds[name] * 1000
+        lines.append(f"{name:<32}{calls:>8}{total_ms:>12.1f}{total_ms / calls:>10.3f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Headless end-to-end GUI latency benchmark"
+    )
+    parser.add_argument(
+        "--format",
+        type=parse_format,
+        required=True,
+        help="Format to play, as generation,tier,elo_floor (e.g. 3,ou,1500)",
+    )
+    parser.add_argument(
+        "--switch-format",
+        type=parse_format,
+        help="Second format to switch to halfway through the sessions",
+    )
+    parser.add_argument("--battles", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--tabs",
+        type=int,
+        default=1,
+        help="Number of battle tabs to play in turn, switching tabs between battles",
+    )
+    parser.add_argument(
+        "--lookahead", action="store_true", help="Turn on the lookahead view"
+    )
+    parser.add_argument(
+        "--intervals", action="store_true", help="Turn on the confidence intervals"
+    )
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    stats = HandlerStats()
+    instrument(stats)
+    window = MainWindow(initial_format=args.format)
+    window.lookahead_action.setChecked(args.lookahead)
+    window.intervals_action.setChecked(args.intervals)
+
+    session = BattleSession(app, window, np.random.default_rng(args.seed))
+    for _ in range(args.tabs - 1):
+        window.new_battle()
+    for battle in range(args.battles):
+        if args.switch_format is not None and battle == args.battles // 2:
+            session.timed("format switch", window.set_format, *args.switch_format)
+        if args.tabs > 1:
+            session.timed(
+                "switch battle", window.battle_tabs.setCurrentIndex, battle % args.tabs
+            )
+        session.play_battle()
+
+    print(percentile_table(session.latencies))
+    print()
+    print(handler_table(stats))
+    window.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,16 @@
 # Calculate likelihoods for given data
+import numpy as np
+import pandas as pd
+
+from calculations.low_rank_teammates import LowRankTeammates
+
+
+def teammate_scores(teammates_df, opposing_pokemon):
+    # Low rank models only rebuild (and clip) the revealed columns, never the whole
+    # matrix
+    if isinstance(teammates_df, LowRankTeammates):
+        return teammates_df.column_sums(opposing_pokemon)
+    return teammates_df[opposing_pokemon].sum(axis=1)
 
 
 def calculate_likelihoods(
@@ -8,8 +20,30 @@ def calculate_likelihoods(
     raw_rates_df,
     opposing_pokemon,
     your_checked_pokemon,
+    cooccurrence_index=None,
+    min_support=50,
 ):
-    base_likelihood = teammates_df[opposing_pokemon].sum(axis=1).drop(opposing_pokemon)
+    base_likelihood = teammate_scores(teammates_df, opposing_pokemon)
+    if cooccurrence_index is not None:
+        # Use how often the revealed pokemon were seen together with each candidate
+        # when there are enough replays, rather than averaging the pairwise rates
+        higher_order_likelihood = cooccurrence_index.conditional_likelihoods(
+            opposing_pokemon, base_likelihood.index, min_support
+        )
+        if higher_order_likelihood is not None:
+            # Candidates missing from the replays keep their pairwise score, scaled
+            # to match the replay based scores of everything else
+            known = higher_order_likelihood.notna() & ~base_likelihood.index.isin(
+                opposing_pokemon
+            )
+            if known.any():
+                scale = (
+                    higher_order_likelihood[known].sum() / base_likelihood[known].sum()
+                )
+                base_likelihood = higher_order_likelihood.fillna(
+                    base_likelihood * scale
+                )
+    base_likelihood = base_likelihood.drop(opposing_pokemon)
     base_likelihood = base_likelihood / base_likelihood.sum()
     lead_adjusted_likelihood = base_likelihood * counts_df["Non Lead Multiplier"]
     lead_adjusted_likelihood = lead_adjusted_likelihood / lead_adjusted_likelihood.sum()
@@ -34,3 +68,179 @@ def calculate_likelihoods(
     disproportionality = (display_likelihood - raw_rates_df) / raw_rates_df
 
     return display_likelihood, disproportionality
+
+
+def calculate_lookahead_likelihoods(
+    teammates_df,
+    counts_df,
+    checks_df,
+    opposing_pokemon,
+    your_checked_pokemon,
+):
+    # Column c holds the display likelihood calculate_likelihoods would return
+    # if c were revealed next. All candidates are scored in one matrix pass
+    # rather than calling calculate_likelihoods once per candidate. Only the
+    # candidate columns are selected, so low rank models never rebuild the rest.
+    rows = teammates_df.index.drop(opposing_pokemon)
+    row_positions = teammates_df.index.get_indexer(rows)
+    candidates = rows.intersection(teammates_df.columns)
+    candidate_rows = rows.get_indexer(candidates)
+    candidate_cols = np.arange(len(candidates))
+
+    current = teammate_scores(teammates_df, opposing_pokemon).to_numpy()[row_positions]
+    candidate_scores = teammates_df[candidates].to_numpy(dtype=float)[row_positions]
+    likelihood = current[:, None] + candidate_scores
+    # A revealed candidate can't also be hidden (species clause)
+    likelihood[candidate_rows, candidate_cols] = 0
+    likelihood = likelihood / np.nansum(likelihood, axis=0)
+    likelihood *= counts_df["Non Lead Multiplier"].reindex(rows).to_numpy()[:, None]
+    likelihood = likelihood / np.nansum(likelihood, axis=0)
+
+    for mon in your_checked_pokemon:
+        checks = checks_df[mon]
+        valid_checks = checks.index.intersection(opposing_pokemon)
+        best_seen = checks.loc[valid_checks].max() if len(valid_checks) > 0 else np.nan
+        # The candidate becomes the best check seen if it beats the revealed ones
+        best_check = np.fmax(best_seen, checks.reindex(candidates).to_numpy())
+        derate = 1 - np.clip(
+            checks.reindex(rows).to_numpy()[:, None] - best_check, 0, None
+        )
+        # Candidates that leave no valid checks on the field aren't derated
+        derate[:, np.isnan(best_check)] = 1
+        likelihood *= derate
+        likelihood = likelihood / np.nansum(likelihood, axis=0)
+
+    likelihood[candidate_rows, candidate_cols] = np.nan
+
+    return pd.DataFrame(likelihood, index=rows, columns=candidates)
+
+
+def summarize_lookahead(display_likelihood, lookahead_likelihood, top_n=10):
+    # Rank the candidates by how much revealing them would move the ranking,
+    # weighted by how likely they are to be revealed at all
+    rows = lookahead_likelihood.index
+    candidates = lookahead_likelihood.columns
+    lookahead = lookahead_likelihood.to_numpy()
+    current = display_likelihood.reindex(rows).to_numpy()
+    candidate_chance = display_likelihood.reindex(candidates).to_numpy()
+    candidate_rows = rows.get_indexer(candidates)
+
+    # Compare against the current ranking with the candidate itself removed
+    baseline = current[:, None] / (1 - candidate_chance)
+    baseline[candidate_rows, np.arange(len(candidate_rows))] = np.nan
+    shift = 0.5 * np.nansum(np.abs(lookahead - baseline), axis=0)
+    expected_shift = candidate_chance * shift
+    # Largest expected shift first, candidates without one last
+    order = np.argsort(-np.nan_to_num(expected_shift, nan=-np.inf), kind="stable")
+    order = order[:top_n]
+
+    # Top rows of the current ranking and of every summarised candidate's ranking,
+    # found together with one partial sort
+    top_n = min(top_n, len(rows))
+    ranked = np.nan_to_num(np.column_stack([current, lookahead[:, order]]), nan=-np.inf)
+    top_rows = np.argpartition(-ranked, top_n - 1, axis=0)[:top_n]
+    current_top = set(rows[top_rows[:, 0]])
+    rises = []
+    drops = []
+    for column, candidate in enumerate(candidates[order], start=1):
+        new_top = set(rows[top_rows[:, column]])
+        rises.append(sorted(new_top - current_top))
+        drops.append(sorted(current_top - new_top - {candidate}))
+
+    return pd.DataFrame(
+        {
+            "Likelihood": candidate_chance[order],
+            "Shift": shift[order],
+            "Expected Shift": expected_shift[order],
+            "Rises": rises,
+            "Drops": drops,
+        },
+        index=candidates[order],
+    )
+
+
+def calculate_likelihood_intervals(
+    teammates_df,
+    counts_df,
+    checks_df,
+    check_deviations_df,
+    raw_rates_df,
+    opposing_pokemon,
+    your_checked_pokemon,
+    replicates=200,
+    confidence=0.95,
+    teammate_slots=5,
+    rng=0,
+):
+    # Bootstrap intervals for calculate_likelihoods. All replicates run through the
+    # same lead and check adjustments together as (replicates, pokemon) arrays.
+    # The fixed default seed gives the same intervals for the same inputs, so they
+    # don't flicker (or change every row) when an unrelated field is edited.
+    rng = np.random.default_rng(rng)
+    rows = teammates_df.index.drop(opposing_pokemon)
+    row_positions = teammates_df.index.get_indexer(rows)
+    raw_counts = counts_df["Raw"]
+
+    # Each revealed pokemon's teammates are a Dirichlet draw sized by its raw count
+    # (every team it was seen on has teammate_slots teammates)
+    teammate_rates = teammates_df[opposing_pokemon].to_numpy(dtype=float)
+    concentration = teammate_rates * (
+        raw_counts.reindex(opposing_pokemon).to_numpy() * teammate_slots
+    )
+    teammate_draws = rng.standard_gamma(
+        concentration, size=(replicates,) + concentration.shape
+    )
+    teammate_draws /= teammate_draws.sum(axis=1, keepdims=True)
+    likelihood = teammate_draws.sum(axis=2)[:, row_positions]
+    likelihood /= np.nansum(likelihood, axis=1, keepdims=True)
+
+    # Non lead counts are binomial out of the raw count
+    row_counts = raw_counts.reindex(rows).to_numpy()
+    non_lead_multiplier = counts_df["Non Lead Multiplier"].reindex(rows).to_numpy()
+    valid_counts = ~np.isnan(non_lead_multiplier) & (row_counts > 0)
+    non_lead_draws = np.full((replicates, len(rows)), np.nan)
+    non_lead_draws[:, valid_counts] = rng.binomial(
+        row_counts[valid_counts].astype(int),
+        non_lead_multiplier[valid_counts],
+        size=(replicates, valid_counts.sum()),
+    ) / (row_counts[valid_counts])
+    likelihood *= non_lead_draws
+    likelihood /= np.nansum(likelihood, axis=1, keepdims=True)
+
+    # Check/counter scores are drawn from their reported mean and deviation
+    for mon in your_checked_pokemon:
+        valid_checks = checks_df[mon].index.intersection(opposing_pokemon)
+        if len(valid_checks) == 0:
+            continue
+        drawn_pokemon = rows.append(valid_checks)
+        check_draws = np.clip(
+            rng.normal(
+                checks_df[mon].reindex(drawn_pokemon).to_numpy(),
+                check_deviations_df[mon].reindex(drawn_pokemon).to_numpy(),
+                size=(replicates, len(drawn_pokemon)),
+            ),
+            0,
+            1,
+        )
+        best_check = check_draws[:, len(rows) :].max(axis=1, keepdims=True)
+        likelihood *= 1 - np.clip(check_draws[:, : len(rows)] - best_check, 0, None)
+        likelihood /= np.nansum(likelihood, axis=1, keepdims=True)
+
+    raw_rates = raw_rates_df.reindex(rows).to_numpy()
+    disproportionality = (likelihood - raw_rates) / raw_rates
+
+    # Missing data leaves whole columns NaN, so plain percentile (which keeps those
+    # NaN) works and is much faster than nanpercentile
+    tail = (1 - confidence) / 2 * 100
+    likelihood_bounds = np.percentile(likelihood, [tail, 100 - tail], axis=0)
+    disproportionality_bounds = np.percentile(
+        disproportionality, [tail, 100 - tail], axis=0
+    )
+    likelihood_intervals = pd.DataFrame(
+        likelihood_bounds.T, index=rows, columns=["Lower", "Upper"]
+    )
+    disproportionality_intervals = pd.DataFrame(
+        disproportionality_bounds.T, index=rows, columns=["Lower", "Upper"]
+    )
+
+    return likelihood_intervals, disproportionality_intervals
@@ -0,0 +1,150 @@
+# Low rank approximation of the normalized teammate matrix
+import numpy as np
+import pandas as pd
+
+
+class LowRankTeammates:
+    """
+    Stand-in for the teammates DataFrame stored as two rank r factors, so that
+    teammates ≈ row_factors @ column_factors.T takes O(N·r) memory instead of O(N²).
+    Supports the parts of the DataFrame interface the calculations use (index, columns
+    and selecting columns), only ever reconstructing the selected columns.
+    """
+
+    def __init__(self, row_factors, column_factors, index, columns, report=None):
+        self.row_factors = row_factors
+        self.column_factors = column_factors
+        self.index = index
+        self.columns = columns
+        self.column_positions = pd.Series(np.arange(len(columns)), index=columns)
+        self.report = report
+
+    @property
+    def rank(self):
+        return self.row_factors.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.row_factors.nbytes + self.column_factors.nbytes
+
+    def __getitem__(self, columns):
+        return pd.DataFrame(
+            self.column_values(columns), index=self.index, columns=columns
+        )
+
+    def column_sums(self, columns):
+        """Equivalent to teammates[columns].sum(axis=1), without building a DataFrame"""
+        return pd.Series(self.column_values(columns).sum(axis=1), index=self.index)
+
+    def column_values(self, columns):
+        # Raises a KeyError for unknown columns, same as the DataFrame
+        positions = self.column_positions.loc[columns].to_numpy()
+        # Truncation can leave small negative values which aren't valid rates. Every
+        # path clips each entry (not sums of entries) so they all score one matrix
+        return np.clip(self.row_factors @ self.column_factors[positions].T, 0, None)
+
+    def to_dataframe(self):
+        return self[self.columns]
+
+
+def factorize_teammates(
+    teammates_df, target_error=0.02, min_top_overlap=0.95, max_rank=None
+):
+    """
+    Build the smallest truncated SVD of the teammate matrix that is within the target
+    error and whose single reveal top 10s agree well enough with the exact ones
+    :param teammates_df: Normalized teammate DataFrame from get_teammates_df
+    :param target_error: Maximum relative (Frobenius) reconstruction error
+    :param min_top_overlap: Minimum top 10 agreement (see accuracy_report)
+    :param max_rank: Optional upper bound on the rank, even if the targets aren't met
+    :return: LowRankTeammates with a report of its accuracy against teammates_df
+    """
+    values = teammates_df.to_numpy(dtype=float)
+    u, s, vt = np.linalg.svd(values, full_matrices=False)
+
+    # Relative error from dropping every singular value from position r onwards
+    tail_energy = np.sqrt(np.cumsum((s**2)[::-1])[::-1] / (s**2).sum())
+    errors = np.append(tail_energy[1:], 0)
+    highest = len(s) if max_rank is None else min(max_rank, len(s))
+
+    def truncate(rank):
+        low_rank = LowRankTeammates(
+            u[:, :rank] * s[:rank],
+            vt[:rank].T,
+            teammates_df.index,
+            teammates_df.columns,
+        )
+        low_rank.report = accuracy_report(teammates_df, low_rank)
+        low_rank.report["reconstruction_error"] = float(errors[rank - 1])
+        return low_rank
+
+    # Agreement grows with the rank (near enough), so bisect between the rank that
+    # meets the error target and the highest allowed one
+    lowest = min(int(np.argmax(errors <= target_error)) + 1, highest)
+    best = truncate(lowest)
+    if best.report["top_overlap"] >= min_top_overlap or lowest == highest:
+        return best
+    best = truncate(highest)
+    while highest - lowest > 1:
+        middle = (lowest + highest) // 2
+        low_rank = truncate(middle)
+        if low_rank.report["top_overlap"] >= min_top_overlap:
+            highest = middle
+            best = low_rank
+        else:
+            lowest = middle
+
+    return best
+
+
+def accuracy_report(teammates_df, low_rank, top_n=10):
+    """
+    Compare single reveal predictions from the exact and low rank models
+    :return: dict with the rank, size relative to the dense matrix, mean and max
+        absolute error in the predicted likelihoods and top_overlap, the mean share of
+        each low rank top_n that is also in the exact top_n
+    """
+    exact = single_reveal_likelihoods(teammates_df)
+    approximate = single_reveal_likelihoods(low_rank.to_dataframe())
+    absolute_error = np.abs(exact - approximate)
+
+    return {
+        "rank": low_rank.rank,
+        "size_ratio": low_rank.nbytes / teammates_df.to_numpy(dtype=float).nbytes,
+        "mean_abs_error": float(np.nanmean(absolute_error)),
+        "max_abs_error": float(np.nanmax(absolute_error)),
+        "top_overlap": top_overlap(exact, approximate, top_n),
+    }
+
+
+def single_reveal_likelihoods(teammates_df):
+    # Column A is the base likelihood of everything else when only A is revealed
+    likelihood = teammates_df.to_numpy(dtype=float).copy()
+    revealed_rows = teammates_df.index.get_indexer(teammates_df.columns)
+    has_row = revealed_rows >= 0
+    likelihood[revealed_rows[has_row], np.flatnonzero(has_row)] = 0
+    totals = likelihood.sum(axis=0)
+    totals[totals == 0] = np.nan
+    return likelihood / totals
+
+
+def top_overlap(exact, approximate, top_n):
+    # Rare pokemon have many candidates tied (usually at 0) around their exact top_n
+    # cut off, so any of those counts as agreeing rather than an arbitrary pick of them
+    top_n = min(top_n, exact.shape[0])
+    exact = np.nan_to_num(exact, nan=-np.inf)
+    cutoff = -np.partition(-exact, top_n - 1, axis=0)[top_n - 1]
+    agreeing = (top_mask(approximate, top_n) & (exact >= cutoff)).sum(axis=0)
+    # Columns without any exact likelihoods have nothing to agree with
+    return float(agreeing[np.isfinite(cutoff)].mean() / top_n)
+
+
+def top_mask(likelihood, top_n):
+    # Boolean mask of the top_n rows of each column
+    top_n = min(top_n, likelihood.shape[0])
+    mask = np.zeros(likelihood.shape, dtype=bool)
+    top_rows = np.argpartition(
+        -np.nan_to_num(likelihood, nan=-np.inf), top_n - 1, axis=0
+    )[:top_n]
+    np.put_along_axis(mask, top_rows, True, axis=0)
+    return mask
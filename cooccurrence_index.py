@@ -0,0 +1,220 @@
+# Higher order (triple and larger) teammate counts built from a local replay corpus
+# Smogon only publishes pairwise teammate data, so P(C | A & B) has to be approximated by
+# averaging P(C | A) and P(C | B). Counting from replays lets the prediction use it directly.
+#
+# Example:
+#   python cooccurrence_index.py replays/ --output data/gen3ou.npz --format-id gen3ou
+import argparse
+import itertools
+import sys
+
+import numpy as np
+import pandas as pd
+
+import battle_log
+
+# Species ids are packed 16 bits at a time into a single 64 bit key
+MAX_KEY_ORDER = 4
+ID_BITS = 16
+
+
+class CooccurrenceIndex:
+    """
+    Count-min sketch of how many teams contained each set of 1 to max_order species.
+    Memory is fixed by the table size no matter how many games are added, and counts
+    can only be overestimated (by hash collisions), never underestimated.
+    """
+
+    def __init__(
+        self, memory_bytes=64 * 2**20, depth=4, max_order=3, seed=0, format_id=None
+    ):
+        """
+        :param memory_bytes: Size of the count table (the species list is negligible)
+        :param depth: Number of hash rows, more rows means fewer overestimates
+        :param max_order: Largest set of teammates counted (3 = triples)
+        :param format_id: Format the teams come from (e.g. "gen3ou"), None if mixed
+        """
+        if not 2 <= max_order <= MAX_KEY_ORDER:
+            raise ValueError(f"max_order must be between 2 and {MAX_KEY_ORDER}")
+        width_bits = int(np.log2(memory_bytes // (depth * 4)))
+        self.table = np.zeros((depth, 2**width_bits), dtype=np.uint32)
+        rng = np.random.default_rng(seed)
+        # Odd multipliers for multiply-shift hashing
+        self.multipliers = rng.integers(0, 2**63, size=depth, dtype=np.uint64) | 1
+        self.max_order = max_order
+        self.format_id = format_id
+        self.species = {}
+        self.team_count = 0
+        self.pending_keys = []
+
+    @property
+    def width_bits(self):
+        return int(np.log2(self.table.shape[1]))
+
+    # Building
+    def add_team(self, team):
+        """Count every subset (up to max_order) of a team's species"""
+        ids = sorted(self.species_id(species) for species in team)
+        for order in range(1, min(self.max_order, len(ids)) + 1):
+            self.pending_keys.extend(
+                pack_key(combo) for combo in itertools.combinations(ids, order)
+            )
+        self.team_count += 1
+        if len(self.pending_keys) >= 2**16:
+            self.flush()
+
+    def flush(self):
+        # Batch the table updates, one numpy call per hash row
+        if len(self.pending_keys) == 0:
+            return
+        keys = np.array(self.pending_keys, dtype=np.uint64)
+        for row, positions in enumerate(self.positions(keys)):
+            np.add.at(self.table[row], positions, 1)
+        self.pending_keys = []
+
+    def species_id(self, species):
+        # Ids start at 1 so that 0 can mark the unused slots of a key
+        if species not in self.species:
+            if len(self.species) >= 2**ID_BITS - 1:
+                raise ValueError("Too many species for the index")
+            self.species[species] = len(self.species) + 1
+        return self.species[species]
+
+    # Querying
+    def positions(self, keys):
+        with np.errstate(over="ignore"):
+            hashed = keys[None, :] * self.multipliers[:, None]
+        return (hashed >> np.uint64(64 - self.width_bits)).astype(np.int64)
+
+    def counts(self, id_sets):
+        """
+        :param id_sets: (n, order) array of species ids, 0 for unknown species
+        :return: Estimated number of teams containing each set
+        """
+        id_sets = np.sort(id_sets, axis=1)
+        keys = np.zeros(len(id_sets), dtype=np.uint64)
+        for column in range(id_sets.shape[1]):
+            keys |= id_sets[:, column].astype(np.uint64) << np.uint64(ID_BITS * column)
+        estimates = self.table[
+            np.arange(len(self.table))[:, None], self.positions(keys)
+        ]
+        estimates = estimates.min(axis=0)
+        # Sets with a species never seen in the replays can't have been counted
+        estimates[(id_sets == 0).any(axis=1)] = 0
+        return estimates
+
+    def conditional_likelihoods(self, revealed, candidates, min_support=50):
+        """
+        Average P(candidate | S) over the largest subsets S of the revealed pokemon that
+        have been seen together on at least min_support teams
+        :return: Series over the candidates, NaN for candidates never seen in the
+            replays, or None if no subset has enough support
+        """
+        revealed_ids = [self.species.get(species, 0) for species in revealed]
+        candidate_ids = np.array([self.species.get(mon, 0) for mon in candidates])
+
+        for order in range(min(self.max_order - 1, len(revealed)), 1, -1):
+            subsets = np.array(list(itertools.combinations(revealed_ids, order)))
+            support = self.counts(subsets)
+            subsets = subsets[support >= min_support]
+            support = support[support >= min_support]
+            if len(subsets) == 0:
+                continue
+            # Every supported subset joined with every candidate
+            joined = np.hstack(
+                [
+                    np.repeat(subsets, len(candidate_ids), axis=0),
+                    np.tile(candidate_ids, len(subsets))[:, None],
+                ]
+            )
+            together = self.counts(joined).reshape(len(subsets), len(candidate_ids))
+            likelihood = np.minimum(together / support[:, None], 1).mean(axis=0)
+            # Not the same as never seen together, e.g. a forme named differently in
+            # the replays than in the Smogon stats
+            likelihood[candidate_ids == 0] = np.nan
+            return pd.Series(likelihood, index=candidates)
+
+        return None
+
+    # Saving
+    def save(self, path):
+        self.flush()
+        np.savez_compressed(
+            path,
+            table=self.table,
+            multipliers=self.multipliers,
+            species=np.array(list(self.species), dtype=str),
+            max_order=self.max_order,
+            team_count=self.team_count,
+            format_id=self.format_id or "",
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            index = cls.__new__(cls)
+            index.table = saved["table"]
+            index.multipliers = saved["multipliers"]
+            index.species = {
+                str(species): number + 1
+                for number, species in enumerate(saved["species"])
+            }
+            index.max_order = int(saved["max_order"])
+            index.team_count = int(saved["team_count"])
+            # Indexes saved before the format was recorded count as mixed formats
+            format_id = str(saved["format_id"]) if "format_id" in saved else ""
+            index.format_id = format_id or None
+            index.pending_keys = []
+        return index
+
+
+def pack_key(ids):
+    key = 0
+    for position, species_id in enumerate(ids):
+        key |= species_id << (ID_BITS * position)
+    return key
+
+
+def build_index(paths, format_id=None, progress_every=100_000, **index_options):
+    """
+    Stream every replay under the given paths into a new CooccurrenceIndex
+    :param paths: Replay files or directories (see battle_log.iter_replay_lines)
+    :param format_id: Only count battles of this format (e.g. "gen3ou")
+    :param index_options: Passed to CooccurrenceIndex (memory_bytes, depth, max_order)
+    """
+    index = CooccurrenceIndex(format_id=format_id, **index_options)
+    for path in battle_log.find_replay_files(paths):
+        lines = battle_log.iter_replay_lines(path)
+        for team in battle_log.iter_battle_teams(lines, format_id=format_id):
+            index.add_team(team)
+            if progress_every and index.team_count % progress_every == 0:
+                print(f"{index.team_count} teams counted", file=sys.stderr)
+    index.flush()
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count higher order teammate co-occurrences from local replays"
+    )
+    parser.add_argument("paths", nargs="+", help="Replay files or directories")
+    parser.add_argument("--output", required=True, help="Where to save the .npz index")
+    parser.add_argument("--format-id", help="Only count this format, e.g. gen3ou")
+    parser.add_argument("--memory-mb", type=int, default=64)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--max-order", type=int, default=3)
+    args = parser.parse_args()
+
+    index = build_index(
+        args.paths,
+        format_id=args.format_id,
+        memory_bytes=args.memory_mb * 2**20,
+        depth=args.depth,
+        max_order=args.max_order,
+    )
+    index.save(args.output)
+    print(f"{index.team_count} teams counted, saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
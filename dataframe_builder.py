@@ -74,16 +74,28 @@ def get_teammates_df(chaos_file: dict, normalize=True) -> pd.DataFrame:
     return teammates_df
 
 
-def get_checks_df(chaos_file: dict) -> pd.DataFrame:
+def get_check_dict_df(chaos_file: dict) -> pd.DataFrame:
+    # Each entry is [encounters, score, score standard deviation]
     check_dict = {
         pokemon: data["Checks and Counters"]
         for pokemon, data in chaos_file["data"].items()
     }
-    check_dict_df = pd.DataFrame.from_dict(check_dict, orient="columns")
+    return pd.DataFrame.from_dict(check_dict, orient="columns")
+
+
+def get_checks_df(chaos_file: dict) -> pd.DataFrame:
+    check_dict_df = get_check_dict_df(chaos_file)
     # check_encounters_df = check_dict_df.map(
     #     lambda x: x[0] if isinstance(x, list) else 0
     # )
     check_rate_df = check_dict_df.map(lambda x: x[1] if isinstance(x, list) else 0)
-    # check_rate_std_df = check_dict_df.map(lambda x: x[2] if isinstance(x, list) else 0)
 
     return check_rate_df
+
+
+def get_check_deviations_df(chaos_file: dict) -> pd.DataFrame:
+    # Standard deviation of each check/counter score, same layout as get_checks_df
+    check_dict_df = get_check_dict_df(chaos_file)
+    check_rate_std_df = check_dict_df.map(lambda x: x[2] if isinstance(x, list) else 0)
+
+    return check_rate_std_df
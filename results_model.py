@@ -0,0 +1,256 @@
+# Table model/view used to show the full ranking of likely hidden pokemon
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSize, Qt
+from PyQt6.QtGui import QColor, QPixmap
+from PyQt6.QtWidgets import QAbstractItemView, QHeaderView, QTableView
+
+SPRITE_SIZE = 40
+
+
+class RankedResultsModel(QAbstractTableModel):
+    """
+    Ranked view over a Series of per-pokemon values (e.g. display likelihoods).
+    Only the rows the view has asked for are ordered (partially, with argpartition) and
+    more are ordered as the user scrolls. Each update only signals the rows that
+    actually changed, and sprites are loaded the first time a row is drawn.
+    """
+
+    COLUMNS = ["Pokemon", "%", "Since Reveal", "95% Interval"]
+
+    def __init__(self, sprite_path, page_size=10, parent=None):
+        """
+        :param sprite_path: Function from a pokemon name to its sprite file (or None)
+        :param page_size: Number of rows ordered up front and added per fetchMore
+        """
+        super().__init__(parent)
+        self.sprite_path = sprite_path
+        self.page_size = page_size
+        self.sprites = {}
+        self.names = np.array([], dtype=object)
+        self.values = np.array([])
+        self.baseline = None
+        self.rows = []
+        self.message = None
+        self.intervals = None
+        self.updating = False
+
+    # Public updates
+    def set_values(
+        self,
+        values: pd.Series,
+        new_reveal: bool = False,
+        intervals: Optional[pd.DataFrame] = None,
+    ):
+        """
+        :param values: Value for every pokemon that could be hidden
+        :param new_reveal: Whether an opposing pokemon was revealed since the last
+            update, which makes the previous values the baseline for the deltas
+        :param intervals: Optional DataFrame with "Lower" and "Upper" columns giving
+            the uncertainty interval of each value
+        """
+        self.intervals = intervals
+        if new_reveal and self.message is None and len(self.values) > 0:
+            self.baseline = pd.Series(self.values, index=self.names)
+        values = values.dropna()
+        self.names = values.index.to_numpy(dtype=object)
+        self.values = values.to_numpy(dtype=float)
+        self.message = None
+        self.update_rows(max(len(self.rows), self.page_size))
+
+    def set_message(self, message: str):
+        """Replace the ranking with a single line of text (e.g. an error)"""
+        self.message = message
+        self.names = np.array([], dtype=object)
+        self.values = np.array([])
+        self.update_rows(0)
+
+    def clear(self):
+        self.message = None
+        self.baseline = None
+        self.names = np.array([], dtype=object)
+        self.values = np.array([])
+        self.update_rows(0)
+
+    def save_state(self):
+        """:return: The shown values and Since Reveal baseline, for restore_state"""
+        if self.message is not None or len(self.values) == 0:
+            return None
+        return pd.Series(self.values, index=self.names), self.baseline
+
+    def restore_state(self, state):
+        """Show values saved by save_state, with the baseline they were compared to"""
+        self.clear()
+        if state is None:
+            return
+        values, self.baseline = state
+        self.intervals = None
+        self.names = values.index.to_numpy(dtype=object)
+        self.values = values.to_numpy(dtype=float)
+        self.update_rows(self.page_size)
+
+    # Ordering
+    def top_order(self, k):
+        # Positions of the k largest values, largest first (ties broken by position)
+        k = min(k, len(self.values))
+        if k < len(self.values):
+            top = np.argpartition(-self.values, k - 1)[:k] if k > 0 else []
+        else:
+            top = np.arange(len(self.values))
+        top = np.asarray(top, dtype=int)
+        return top[np.lexsort((top, -self.values[top]))]
+
+    def update_rows(self, k):
+        # Views (and model testers) may ask to fetch more while rows are being
+        # inserted, which mustn't start a second update in the middle of this one
+        self.updating = True
+        try:
+            self.apply_rows(k)
+        finally:
+            self.updating = False
+
+    def apply_rows(self, k):
+        if self.message is not None:
+            new_rows = [(self.message, np.nan, np.nan, np.nan, np.nan)]
+        else:
+            order = self.top_order(k)
+            names = self.names[order]
+            values = self.values[order]
+            if self.baseline is None:
+                deltas = np.full(len(order), np.nan)
+            else:
+                deltas = values - self.baseline.reindex(names).to_numpy()
+            if self.intervals is None:
+                lower = upper = np.full(len(order), np.nan)
+            else:
+                lower = self.intervals["Lower"].reindex(names).to_numpy()
+                upper = self.intervals["Upper"].reindex(names).to_numpy()
+            new_rows = list(zip(names, values, deltas, lower, upper))
+
+        old_count = len(self.rows)
+        new_count = len(new_rows)
+        if new_count < old_count:
+            self.beginRemoveRows(QModelIndex(), new_count, old_count - 1)
+            self.rows = self.rows[:new_count]
+            self.endRemoveRows()
+        elif new_count > old_count:
+            self.beginInsertRows(QModelIndex(), old_count, new_count - 1)
+            self.rows = self.rows + new_rows[old_count:]
+            self.endInsertRows()
+
+        # Signal each run of consecutive changed rows in the part that was kept
+        run_start = None
+        for row in range(min(old_count, new_count) + 1):
+            changed = row < min(old_count, new_count) and not same_row(
+                self.rows[row], new_rows[row]
+            )
+            if changed:
+                self.rows[row] = new_rows[row]
+                if run_start is None:
+                    run_start = row
+            elif run_start is not None:
+                self.dataChanged.emit(
+                    self.index(run_start, 0),
+                    self.index(row - 1, len(self.COLUMNS) - 1),
+                )
+                run_start = None
+
+    # QAbstractTableModel interface
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return (
+            not parent.isValid()
+            and not self.updating
+            and self.message is None
+            and len(self.rows) < len(self.values)
+        )
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self.update_rows(len(self.rows) + self.page_size)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return str(section + 1)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name, value, delta, lower, upper = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return name
+            if column == 1 and not np.isnan(value):
+                return f"{value * 100:.3f} %"
+            if column == 2 and not np.isnan(delta):
+                return f"{delta * 100:+.3f} %"
+            if column == 3 and not np.isnan(lower):
+                return f"{lower * 100:.3f} – {upper * 100:.3f} %"
+        elif role == Qt.ItemDataRole.DecorationRole:
+            if column == 0 and self.message is None:
+                return self.sprite(name)
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == 2 and not np.isnan(delta) and delta != 0:
+                return QColor("darkgreen") if delta > 0 else QColor("darkred")
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            if column > 0:
+                return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def sprite(self, name):
+        # Only load sprites for rows that actually get drawn
+        if name not in self.sprites:
+            path = self.sprite_path(name)
+            self.sprites[name] = (
+                QPixmap(path).scaled(
+                    SPRITE_SIZE,
+                    SPRITE_SIZE,
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation,
+                )
+                if path is not None
+                else None
+            )
+        return self.sprites[name]
+
+
+def same_row(old_row, new_row):
+    # NaN safe comparison of (name, value, delta, lower, upper) rows
+    return old_row[0] == new_row[0] and all(
+        (np.isnan(a) and np.isnan(b)) or a == b
+        for a, b in zip(old_row[1:], new_row[1:])
+    )
+
+
+class RankedResultsView(QTableView):
+    def __init__(self, model, visible_rows=10, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setIconSize(QSize(SPRITE_SIZE, SPRITE_SIZE))
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setShowGrid(False)
+        self.verticalHeader().setDefaultSectionSize(SPRITE_SIZE + 4)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.setWordWrap(False)
+        self.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents
+        )
+        self.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.setMinimumHeight(
+            self.horizontalHeader().sizeHint().height()
+            + visible_rows * self.verticalHeader().defaultSectionSize()
+        )
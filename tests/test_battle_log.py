@@ -0,0 +1,131 @@
+import os
+import time
+
+import battle_log
+from battle_log import BattleLogWatcher, LogEvent, iter_battle_teams, parse_reveal
+
+
+def append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+def test_parse_reveal():
+    assert parse_reveal("|switch|p2a: Ttar|Tyranitar, L100, M|100/100\n") == (
+        "p2",
+        "Tyranitar",
+    )
+    assert parse_reveal("|poke|p1|Skarmory, F|") == ("p1", "Skarmory")
+    assert parse_reveal("|move|p2a: Ttar|Crunch|p1a: Celebi") is None
+    assert parse_reveal("|poke|p1|Skarmory|", messages={"switch"}) is None
+
+
+def test_iter_battle_teams_splits_rooms():
+    lines = [
+        ">battle-gen3ou-1",
+        "|tier|[Gen 3] OU",
+        "|switch|p1a: A|Tyranitar|100/100",
+        ">battle-gen3uu-2",
+        "|tier|[Gen 3] UU",
+        "|switch|p1a: B|Jynx|100/100",
+        ">battle-gen3ou-1",
+        "|switch|p1a: C|Skarmory|100/100",
+        "|win|someone",
+    ]
+
+    assert list(iter_battle_teams(lines, format_id="gen3ou")) == [
+        {"Tyranitar", "Skarmory"}
+    ]
+
+
+def test_watcher_waits_for_whole_lines(tmp_path):
+    path = tmp_path / "battle.log"
+    append(path, "|player|p1|Me|\n|switch|p2a: Ttar|Tyra")
+    watcher = BattleLogWatcher([str(tmp_path)], your_name="me", rescan_seconds=0)
+
+    assert watcher.poll() == []
+    append(path, "nitar, L100|100/100\n")
+    assert watcher.poll() == [LogEvent(str(path), "Tyranitar")]
+    # Already revealed and your own side are both ignored
+    append(path, "|switch|p2a: Ttar|Tyranitar|100/100\n|switch|p1a: X|Celebi|100/100\n")
+    assert watcher.poll() == []
+
+
+def test_watcher_finds_the_opponent_from_your_name(tmp_path):
+    path = tmp_path / "battle.log"
+    append(
+        path,
+        "|player|p2|Me|\n|switch|p1a: A|Skarmory|100/100\n"
+        "|switch|p2a: B|Celebi|100/100\n",
+    )
+    watcher = BattleLogWatcher([str(path)], your_name="ME", rescan_seconds=0)
+
+    assert watcher.poll() == [LogEvent(str(path), "Skarmory")]
+
+
+def test_watcher_treats_truncated_or_replaced_logs_as_new_battles(tmp_path):
+    path = tmp_path / "battle.log"
+    append(path, "|switch|p2a: A|Skarmory|100/100\n")
+    watcher = BattleLogWatcher([str(tmp_path)], rescan_seconds=0)
+    assert watcher.poll() == [LogEvent(str(path), "Skarmory")]
+
+    path.write_text("")
+    assert watcher.poll() == [LogEvent(str(path), None)]
+    append(path, "|switch|p2a: A|Skarmory|100/100\n")
+    assert watcher.poll() == [LogEvent(str(path), "Skarmory")]
+
+    replacement = tmp_path / "replacement.tmp"
+    replacement.write_text("|switch|p2a: B|Celebi|100/100\n")
+    os.replace(replacement, path)
+    assert watcher.poll() == [
+        LogEvent(str(path), None),
+        LogEvent(str(path), "Celebi"),
+    ]
+
+
+def test_watcher_survives_a_log_disappearing_mid_poll(tmp_path, monkeypatch):
+    path = tmp_path / "battle.log"
+    append(path, "|switch|p2a: A|Skarmory|100/100\n")
+    watcher = BattleLogWatcher([str(tmp_path)], rescan_seconds=0)
+
+    def missing(*args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(battle_log, "open", missing, raising=False)
+    assert watcher.poll() == []
+    monkeypatch.undo()
+    assert watcher.poll() == [LogEvent(str(path), "Skarmory")]
+
+
+def test_watcher_survives_the_folder_disappearing_mid_scan(tmp_path, monkeypatch):
+    path = tmp_path / "battle.log"
+    append(path, "|switch|p2a: A|Skarmory|100/100\n")
+    watcher = BattleLogWatcher([str(tmp_path)], rescan_seconds=0)
+
+    def unmounted(*args, **kwargs):
+        raise FileNotFoundError(tmp_path)
+
+    monkeypatch.setattr(battle_log.os, "scandir", unmounted)
+    assert watcher.poll() == []
+    monkeypatch.undo()
+    assert watcher.poll() == [LogEvent(str(path), "Skarmory")]
+
+
+def test_watcher_only_checks_idle_logs_when_rescanning(tmp_path):
+    old = tmp_path / "old.log"
+    old.write_text("|switch|p2a: A|Skarmory|100/100\n")
+    an_hour_ago = time.time() - 3600
+    os.utime(old, (an_hour_ago, an_hour_ago))
+    active = tmp_path / "active.log"
+    active.write_text("")
+    watcher = BattleLogWatcher([str(tmp_path)], rescan_seconds=3600)
+
+    # Logs finished before watching started are followed from their end
+    assert watcher.poll() == []
+    assert watcher.find_log_files() == [str(active)]
+
+    # New logs are only found when the folder is listed again
+    (tmp_path / "new.log").write_text("|switch|p2a: B|Celebi|100/100\n")
+    assert watcher.poll() == []
+    watcher.last_scan = None
+    assert watcher.poll() == [LogEvent(str(tmp_path / "new.log"), "Celebi")]
@@ -0,0 +1,142 @@
+import itertools
+import json
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from calculations.likelihood_calculations import calculate_likelihoods
+from cooccurrence_index import CooccurrenceIndex, build_index
+
+SPECIES = [f"Pokemon{i}" for i in range(12)]
+
+
+def random_teams(count=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return [list(rng.choice(SPECIES, size=6, replace=False)) for _ in range(count)]
+
+
+def true_counts(teams, order):
+    return Counter(
+        combo for team in teams for combo in itertools.combinations(sorted(team), order)
+    )
+
+
+def estimated_counts(index, combos):
+    id_sets = np.array([[index.species[mon] for mon in combo] for combo in combos])
+    return index.counts(id_sets)
+
+
+def test_counts_are_exact_without_collisions():
+    teams = random_teams()
+    index = CooccurrenceIndex(memory_bytes=2**20, max_order=3)
+    for team in teams:
+        index.add_team(team)
+    index.flush()
+
+    for order in (1, 2, 3):
+        expected = true_counts(teams, order)
+        combos = list(expected)
+        np.testing.assert_array_equal(
+            estimated_counts(index, combos), [expected[combo] for combo in combos]
+        )
+    assert index.team_count == len(teams)
+
+
+def test_collisions_only_overestimate():
+    teams = random_teams()
+    # 64 counters per row for several hundred distinct sets
+    index = CooccurrenceIndex(memory_bytes=512, depth=2, max_order=3)
+    for team in teams:
+        index.add_team(team)
+    index.flush()
+
+    expected = true_counts(teams, 3)
+    combos = list(expected)
+    estimates = estimated_counts(index, combos)
+    assert (estimates >= [expected[combo] for combo in combos]).all()
+    assert (estimates > [expected[combo] for combo in combos]).any()
+
+
+def test_conditional_likelihoods():
+    teams = [["A", "B", "C"]] * 60 + [["A", "B", "D"]] * 40 + [["A", "E"]] * 100
+    index = CooccurrenceIndex(memory_bytes=2**20, max_order=3)
+    for team in teams:
+        index.add_team(team)
+    index.flush()
+
+    likelihood = index.conditional_likelihoods(
+        ["A", "B"], pd.Index(["C", "D", "E", "Unseen"]), min_support=50
+    )
+
+    np.testing.assert_allclose(likelihood[["C", "D", "E"]], [0.6, 0.4, 0.0])
+    assert np.isnan(likelihood["Unseen"])
+    # A and B were only seen together 100 times
+    assert (
+        index.conditional_likelihoods(["A", "B"], pd.Index(["C"]), min_support=101)
+        is None
+    )
+
+
+def test_save_and_load(tmp_path):
+    index = CooccurrenceIndex(memory_bytes=2**16, format_id="gen3ou")
+    for team in random_teams(50):
+        index.add_team(team)
+    path = tmp_path / "index.npz"
+    index.save(path)
+
+    loaded = CooccurrenceIndex.load(path)
+
+    np.testing.assert_array_equal(loaded.table, index.table)
+    assert loaded.species == index.species
+    assert loaded.format_id == "gen3ou"
+    assert loaded.team_count == 50
+
+
+def test_build_index_only_counts_the_format(tmp_path):
+    replays = [
+        {
+            "id": "one",
+            "formatid": "gen3ou",
+            "log": "|poke|p1|Tyranitar\n|poke|p1|Skarmory",
+        },
+        {"id": "two", "formatid": "gen3uu", "log": "|poke|p1|Tyranitar\n|poke|p1|Jynx"},
+    ]
+    (tmp_path / "replays.jsonl").write_text(
+        "\n".join(json.dumps(replay) for replay in replays)
+    )
+
+    index = build_index([str(tmp_path)], format_id="gen3ou", memory_bytes=2**16)
+
+    assert index.format_id == "gen3ou"
+    assert index.team_count == 1
+    assert set(index.species) == {"Tyranitar", "Skarmory"}
+
+
+def test_candidates_missing_from_replays_keep_pairwise_score():
+    names = ["A", "B", "C", "D", "Forme-Alt"]
+    teammates = pd.DataFrame(
+        np.full((5, 5), 0.25) - np.eye(5) * 0.25, index=names, columns=names
+    )
+    counts = pd.DataFrame({"Raw": 100, "Non Lead Multiplier": 1.0}, index=names)
+    raw_rates = counts["Raw"] / counts["Raw"].sum()
+    index = CooccurrenceIndex(memory_bytes=2**16)
+    for team in [["A", "B", "C"]] * 60 + [["A", "B", "D"]] * 40:
+        index.add_team(team)
+    index.flush()
+
+    display_likelihood, _ = calculate_likelihoods(
+        teammates,
+        counts,
+        None,
+        raw_rates,
+        ["A", "B"],
+        [],
+        cooccurrence_index=index,
+    )
+
+    # C and D share the known mass 0.6 : 0.4, the unseen forme keeps its pairwise
+    # share (equal to the average of C and D)
+    np.testing.assert_allclose(
+        display_likelihood[["C", "D", "Forme-Alt"]], np.array([0.6, 0.4, 0.5]) / 1.5
+    )
@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calculations.likelihood_calculations import (
+    calculate_likelihood_intervals,
+    calculate_likelihoods,
+    calculate_lookahead_likelihoods,
+    summarize_lookahead,
+)
+from calculations.low_rank_teammates import factorize_teammates
+
+
+def make_format(size=30, seed=0):
+    # Random format data shaped like the dataframe_builder output
+    rng = np.random.default_rng(seed)
+    names = [f"Pokemon{i}" for i in range(size)]
+    teammates = pd.DataFrame(rng.random((size, size)), index=names, columns=names)
+    teammates.values[np.arange(size), np.arange(size)] = 0
+    teammates = teammates / teammates.sum(axis=0)
+    counts = pd.DataFrame({"Raw": rng.integers(50, 5000, size)}, index=names)
+    counts["Non Lead Multiplier"] = rng.uniform(0.5, 1, size)
+    # Like the chaos data, the rarest pokemon have no checks and counters entries
+    checks = pd.DataFrame(
+        rng.uniform(0, 1, (size - 5, size)), index=names[: size - 5], columns=names
+    )
+    raw_rates = counts["Raw"] / counts["Raw"].sum()
+    return teammates, counts, checks, raw_rates
+
+
+@pytest.mark.parametrize("low_rank", [False, True])
+@pytest.mark.parametrize(
+    "opposing, checked",
+    [
+        (["Pokemon1"], []),
+        (["Pokemon1", "Pokemon2"], ["Pokemon3"]),
+        # Pokemon27 has no checks data, so candidates decide the best check seen
+        (["Pokemon27"], ["Pokemon3", "Pokemon4"]),
+    ],
+)
+def test_lookahead_matches_calculating_each_reveal(opposing, checked, low_rank):
+    teammates, counts, checks, raw_rates = make_format()
+    if low_rank:
+        # Low enough to leave negative entries which have to be clipped the same way
+        teammates = factorize_teammates(teammates, max_rank=3)
+
+    lookahead = calculate_lookahead_likelihoods(
+        teammates, counts, checks, opposing, checked
+    )
+
+    assert list(lookahead.index) == list(teammates.index.drop(opposing))
+    for candidate in lookahead.columns:
+        expected, _ = calculate_likelihoods(
+            teammates, counts, checks, raw_rates, opposing + [candidate], checked
+        )
+        hidden = lookahead.index.drop(candidate)
+        np.testing.assert_allclose(
+            lookahead.loc[hidden, candidate].to_numpy(),
+            expected.reindex(hidden).to_numpy(),
+            rtol=1e-12,
+        )
+        assert np.isnan(lookahead.loc[candidate, candidate])
+
+
+def test_summarize_lookahead_ranks_by_expected_shift():
+    teammates, counts, checks, raw_rates = make_format()
+    opposing = ["Pokemon1", "Pokemon2"]
+    display_likelihood, _ = calculate_likelihoods(
+        teammates, counts, checks, raw_rates, opposing, []
+    )
+    lookahead = calculate_lookahead_likelihoods(teammates, counts, checks, opposing, [])
+
+    summary = summarize_lookahead(display_likelihood, lookahead, top_n=5)
+
+    assert len(summary) == 5
+    assert summary["Expected Shift"].is_monotonic_decreasing
+    np.testing.assert_allclose(
+        summary["Likelihood"], display_likelihood.loc[summary.index]
+    )
+    assert ((summary["Shift"] >= 0) & (summary["Shift"] <= 1)).all()
+
+
+def test_low_rank_column_sums_match_selected_columns():
+    teammates, _, _, _ = make_format()
+    low_rank = factorize_teammates(teammates, max_rank=3)
+    columns = ["Pokemon1", "Pokemon2", "Pokemon3"]
+
+    assert (low_rank.row_factors @ low_rank.column_factors.T < 0).any()
+    np.testing.assert_allclose(
+        low_rank.column_sums(columns), low_rank[columns].sum(axis=1), rtol=1e-12
+    )
+
+
+def meets_targets(report, target_error, min_top_overlap):
+    return (
+        report["reconstruction_error"] <= target_error
+        and report["top_overlap"] >= min_top_overlap
+    )
+
+
+@pytest.mark.parametrize(
+    "target_error, min_top_overlap",
+    [
+        # Reached at a higher rank than the error target alone needs
+        (0.3, 0.9),
+        # The error target alone decides the rank
+        (0.05, 0.5),
+    ],
+)
+def test_factorize_teammates_picks_the_smallest_rank_meeting_both_targets(
+    target_error, min_top_overlap
+):
+    teammates, _, _, _ = make_format()
+
+    low_rank = factorize_teammates(teammates, target_error, min_top_overlap)
+    one_less = factorize_teammates(
+        teammates, target_error=0, min_top_overlap=0, max_rank=low_rank.rank - 1
+    )
+
+    assert meets_targets(low_rank.report, target_error, min_top_overlap)
+    assert not meets_targets(one_less.report, target_error, min_top_overlap)
+
+
+def test_factorize_teammates_respects_max_rank():
+    teammates, _, _, _ = make_format()
+
+    low_rank = factorize_teammates(
+        teammates, target_error=0, min_top_overlap=1, max_rank=4
+    )
+
+    assert low_rank.rank == 4
+    assert low_rank.row_factors.shape == (30, 4)
+    assert set(low_rank.report) == {
+        "rank",
+        "size_ratio",
+        "mean_abs_error",
+        "max_abs_error",
+        "top_overlap",
+        "reconstruction_error",
+    }
+    assert low_rank.report["rank"] == 4
+    assert low_rank.report["size_ratio"] == pytest.approx(8 / 30)
+    assert low_rank.report["reconstruction_error"] > 0
+
+
+def make_check_deviations(checks, scale=0.05, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        rng.uniform(0, scale, checks.shape), index=checks.index, columns=checks.columns
+    )
+
+
+def interval_inputs(opposing, checked):
+    teammates, counts, checks, raw_rates = make_format()
+    return (
+        teammates,
+        counts,
+        checks,
+        make_check_deviations(checks),
+        raw_rates,
+        opposing,
+        checked,
+    )
+
+
+def test_intervals_are_repeatable():
+    inputs = interval_inputs(["Pokemon1", "Pokemon2"], ["Pokemon3"])
+
+    first = calculate_likelihood_intervals(*inputs)
+    second = calculate_likelihood_intervals(*inputs)
+    other_seed = calculate_likelihood_intervals(*inputs, rng=1)
+
+    assert first[0].equals(second[0]) and first[1].equals(second[1])
+    assert not first[0].equals(other_seed[0])
+
+
+@pytest.mark.parametrize(
+    "opposing, checked",
+    [(["Pokemon1"], []), (["Pokemon1", "Pokemon2"], ["Pokemon3", "Pokemon4"])],
+)
+def test_intervals_contain_the_point_estimates(opposing, checked):
+    teammates, counts, checks, deviations, raw_rates, _, _ = interval_inputs(
+        opposing, checked
+    )
+    display_likelihood, disproportionality = calculate_likelihoods(
+        teammates, counts, checks, raw_rates, opposing, checked
+    )
+
+    likelihood_intervals, disproportionality_intervals = calculate_likelihood_intervals(
+        teammates, counts, checks, deviations, raw_rates, opposing, checked
+    )
+
+    for point, intervals in (
+        (display_likelihood, likelihood_intervals),
+        (disproportionality, disproportionality_intervals),
+    ):
+        point = point.reindex(intervals.index)
+        known = point.notna()
+        assert (intervals.loc[known, "Lower"] <= point[known]).all()
+        assert (point[known] <= intervals.loc[known, "Upper"]).all()
+        assert (intervals.loc[known, "Lower"] < intervals.loc[known, "Upper"]).all()
+
+
+def test_intervals_shrink_onto_the_point_estimate_with_more_data():
+    opposing = ["Pokemon1", "Pokemon2"]
+    checked = ["Pokemon3"]
+    teammates, counts, checks, _, raw_rates, _, _ = interval_inputs(opposing, checked)
+    counts["Raw"] = 10**12
+    display_likelihood, _ = calculate_likelihoods(
+        teammates, counts, checks, raw_rates, opposing, checked
+    )
+
+    likelihood_intervals, _ = calculate_likelihood_intervals(
+        teammates, counts, checks, checks * 0, raw_rates, opposing, checked
+    )
+
+    point = display_likelihood.reindex(likelihood_intervals.index)
+    np.testing.assert_allclose(likelihood_intervals["Lower"], point, rtol=1e-4)
+    np.testing.assert_allclose(likelihood_intervals["Upper"], point, rtol=1e-4)
+
+
+def test_pokemon_without_checks_data_stay_unknown():
+    inputs = interval_inputs(["Pokemon1"], ["Pokemon3"])
+
+    likelihood_intervals, disproportionality_intervals = calculate_likelihood_intervals(
+        *inputs
+    )
+
+    # make_format leaves the last 5 pokemon out of the checks data
+    unknown = [f"Pokemon{i}" for i in range(25, 30)]
+    for intervals in (likelihood_intervals, disproportionality_intervals):
+        assert intervals.loc[unknown].isna().all().all()
+        assert intervals.drop(unknown).notna().all().all()
@@ -0,0 +1,144 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QtMsgType, Qt, qInstallMessageHandler  # noqa: E402
+from PyQt6.QtTest import QAbstractItemModelTester  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from results_model import RankedResultsModel  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def model(app):
+    # Every model is checked by Qt's model tester, whose complaints fail the test
+    complaints = []
+
+    def handler(message_type, context, message):
+        if message_type != QtMsgType.QtDebugMsg:
+            complaints.append(message)
+
+    previous_handler = qInstallMessageHandler(handler)
+    model = RankedResultsModel(lambda name: None, page_size=3)
+    tester = QAbstractItemModelTester(
+        model, QAbstractItemModelTester.FailureReportingMode.Warning
+    )
+    yield model
+    qInstallMessageHandler(previous_handler)
+    del tester
+    assert complaints == []
+
+
+def values(**values):
+    return pd.Series(values, dtype=float)
+
+
+def column(model, number):
+    return [model.data(model.index(row, number)) for row in range(model.rowCount())]
+
+
+def test_ties_are_ordered_by_position(model):
+    model.set_values(values(a=1, b=3, c=3, d=2, e=3))
+
+    np.testing.assert_array_equal(model.top_order(2), [1, 2])
+    np.testing.assert_array_equal(model.top_order(5), [1, 2, 4, 3, 0])
+    assert column(model, 0) == ["b", "c", "e"]
+
+
+def test_rows_are_fetched_a_page_at_a_time(model):
+    model.set_values(pd.Series(np.arange(8, dtype=float), index=list("abcdefgh")))
+    assert model.rowCount() == 3
+
+    model.fetchMore()
+    assert model.rowCount() == 6
+    model.fetchMore()
+    assert model.rowCount() == 8
+    assert not model.canFetchMore()
+    # Updates keep every row the view has already fetched
+    model.set_values(pd.Series(np.arange(8, dtype=float), index=list("hgfedcba")))
+    assert column(model, 0) == list("abcdefgh")
+
+
+def test_no_fetching_while_rows_are_inserted(model):
+    fetchable = []
+    model.rowsAboutToBeInserted.connect(
+        lambda *args: fetchable.append(model.canFetchMore())
+    )
+    model.rowsInserted.connect(lambda *args: model.fetchMore())
+
+    model.set_values(pd.Series(np.arange(8, dtype=float), index=list("abcdefgh")))
+
+    assert fetchable == [False]
+    assert model.rowCount() == 3
+
+
+def test_only_changed_rows_are_signalled(model):
+    model.set_values(values(a=6, b=5, c=4, d=3, e=2, f=1))
+    model.fetchMore()
+    changes = []
+    model.dataChanged.connect(
+        lambda first, last: changes.append(
+            (first.row(), first.column(), last.row(), last.column())
+        )
+    )
+
+    model.set_values(values(a=6, b=5, c=4, d=3, e=2, f=1))
+    assert changes == []
+    model.set_values(values(a=6, b=5.5, c=4.5, d=3, e=2.5, f=1))
+    assert changes == [(1, 0, 2, 3), (4, 0, 4, 3)]
+
+
+def test_deltas_are_measured_from_the_last_reveal(model):
+    model.set_values(values(a=0.5, b=0.3, c=0.2))
+    assert column(model, 2) == [None, None, None]
+
+    model.set_values(values(a=0.4, b=0.35, c=0.25), new_reveal=True)
+    assert column(model, 2) == ["-10.000 %", "+5.000 %", "+5.000 %"]
+    assert model.data(model.index(0, 2), Qt.ItemDataRole.ForegroundRole).name() == (
+        "#8b0000"
+    )
+    # Checked/countered changes aren't reveals, so the baseline stays
+    model.set_values(values(a=0.45, b=0.35, c=0.2))
+    assert column(model, 2) == ["-5.000 %", "+5.000 %", "+0.000 %"]
+
+    # A message isn't a ranking to measure from
+    model.set_message("Invalid Pokemon Present")
+    model.set_values(values(a=0.5, b=0.5), new_reveal=True)
+    assert column(model, 2) == ["+0.000 %", "+20.000 %"]
+
+
+def test_intervals_are_shown_with_the_values(model):
+    intervals = pd.DataFrame(
+        {"Lower": [0.4, 0.1], "Upper": [0.6, 0.2]}, index=["a", "b"]
+    )
+    model.set_values(values(a=0.5, b=0.15, c=0.1), intervals=intervals)
+
+    assert column(model, 3) == ["40.000 – 60.000 %", "10.000 – 20.000 %", None]
+
+
+def test_saved_state_keeps_the_baseline(model, app):
+    model.set_values(values(a=0.5, b=0.3, c=0.2))
+    model.set_values(values(a=0.4, b=0.35, c=0.25), new_reveal=True)
+    state = model.save_state()
+    model.clear()
+
+    model.restore_state(state)
+    assert column(model, 0) == ["a", "b", "c"]
+    assert column(model, 2) == ["-10.000 %", "+5.000 %", "+5.000 %"]
+    # A reveal made while the state was saved is measured from the saved values
+    model.set_values(values(a=0.2, b=0.35, c=0.45), new_reveal=True)
+    assert column(model, 2) == ["+20.000 %", "+0.000 %", "-20.000 %"]
+
+    model.set_message("No Hidden Pokemon")
+    assert model.save_state() is None
+    model.restore_state(None)
+    assert model.rowCount() == 0
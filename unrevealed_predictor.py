@@ -1,9 +1,10 @@
+import dataclasses
 import os
 import sys
 from urllib.error import URLError
 
 import pandas as pd
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QAction, QPixmap
 from PyQt6.QtWidgets import (
     QApplication,
@@ -11,19 +12,32 @@ from PyQt6.QtWidgets import (
     QCompleter,
     QDialog,
     QDialogButtonBox,
+    QFileDialog,
     QGridLayout,
+    QInputDialog,
     QLabel,
     QLineEdit,
     QMainWindow,
     QMessageBox,
     QPushButton,
+    QTabBar,
     QVBoxLayout,
     QWidget,
 )
 
 import dataframe_builder as dfb
 import stats_puller
-from calculations.likelihood_calculations import calculate_likelihoods
+from battle_log import BattleLogWatcher, to_id
+from battle_state import TEAM_SIZE, BattleState, FormatModel
+from calculations.likelihood_calculations import (
+    calculate_likelihood_intervals,
+    calculate_likelihoods,
+    calculate_lookahead_likelihoods,
+    summarize_lookahead,
+)
+from calculations.low_rank_teammates import factorize_teammates
+from cooccurrence_index import CooccurrenceIndex
+from results_model import RankedResultsModel, RankedResultsView
 
 
 def resource_path(relative_path):
@@ -33,10 +47,19 @@ def resource_path(relative_path):
 
 
 DEFAULT_IMAGE = resource_path("data/Sprites/201-question.png")
-TEAM_SIZE = 6
+# How often watched battle logs are checked for new lines
+WATCH_INTERVAL_MS = 100
 NUMBER_REFERENCE = pd.read_csv(resource_path("data/pokemon.csv"), index_col=1)
 
 
+def sprite_path(pokemon_name):
+    """Get the sprite file for a pokemon, or None if there isn't one"""
+    if pokemon_name.lower() not in NUMBER_REFERENCE.index:
+        return None
+    pokemon_number = NUMBER_REFERENCE.loc[pokemon_name.lower()].id
+    return resource_path(f"data/Sprites/{pokemon_number}.png")
+
+
 class FormatSelectionDialog(QDialog):
     def __init__(self, format_options_df, parent=None):
         super().__init__(parent)
@@ -92,7 +115,7 @@ class FormatSelectionDialog(QDialog):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, initial_format=None, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.setWindowTitle("Unrevealed Predictor")
@@ -113,6 +136,21 @@ class MainWindow(QMainWindow):
         file_menu = menu.addMenu("&File")
 
         # Add file menu options
+        new_battle_action = QAction("&New Battle", self)
+        new_battle_action.setStatusTip("New Battle")
+        new_battle_action.setShortcut("Ctrl+T")
+        new_battle_action.triggered.connect(self.new_battle)
+        file_menu.addAction(new_battle_action)
+
+        close_battle_action = QAction("Close &Battle", self)
+        close_battle_action.setStatusTip("Close Battle")
+        close_battle_action.setShortcut("Ctrl+W")
+        close_battle_action.triggered.connect(
+            lambda: self.close_battle(self.battle_tabs.currentIndex())
+        )
+        file_menu.addAction(close_battle_action)
+
+        file_menu.addSeparator()
         clear_opp_action = QAction("&Clear Opponent", self)
         clear_opp_action.setStatusTip("Clear Opponent")
         clear_opp_action.setShortcut("Ctrl+C")
@@ -155,6 +193,64 @@ class MainWindow(QMainWindow):
         delete_default_format_action.triggered.connect(self.delete_default_format)
         tools_menu.addAction(delete_default_format_action)
 
+        tools_menu.addSeparator()
+        self.lookahead_action = QAction("Show &Lookahead", self)
+        self.lookahead_action.setStatusTip(
+            "Show how each possible reveal would shift the ranking"
+        )
+        self.lookahead_action.setCheckable(True)
+        self.lookahead_action.toggled.connect(self.toggle_lookahead)
+        tools_menu.addAction(self.lookahead_action)
+
+        self.intervals_action = QAction("Show &Confidence Intervals", self)
+        self.intervals_action.setStatusTip(
+            "Show how uncertain each percentage is given the amount of usage data"
+        )
+        self.intervals_action.setCheckable(True)
+        self.intervals_action.toggled.connect(self.toggle_intervals)
+        tools_menu.addAction(self.intervals_action)
+
+        self.low_rank_action = QAction("Use Low-Rank &Teammate Model", self)
+        self.low_rank_action.setStatusTip(
+            "Score with a compressed approximation of the teammate data"
+        )
+        self.low_rank_action.setCheckable(True)
+        self.low_rank_action.toggled.connect(self.toggle_low_rank)
+        tools_menu.addAction(self.low_rank_action)
+
+        tools_menu.addSeparator()
+        load_cooccurrence_action = QAction("Load &Co-occurrence Index...", self)
+        load_cooccurrence_action.setStatusTip(
+            "Load teammate counts built from local replays"
+        )
+        load_cooccurrence_action.triggered.connect(self.load_cooccurrence_index)
+        tools_menu.addAction(load_cooccurrence_action)
+
+        clear_cooccurrence_action = QAction("Clear Co-occurrence Index", self)
+        clear_cooccurrence_action.setStatusTip("Clear Co-occurrence Index")
+        clear_cooccurrence_action.triggered.connect(
+            lambda: self.set_cooccurrence_index(None)
+        )
+        tools_menu.addAction(clear_cooccurrence_action)
+
+        tools_menu.addSeparator()
+        watch_logs_action = QAction("&Watch Battle Logs...", self)
+        watch_logs_action.setStatusTip(
+            "Fill in opposing reveals from Showdown battle logs as they are written"
+        )
+        watch_logs_action.triggered.connect(self.watch_battle_logs)
+        tools_menu.addAction(watch_logs_action)
+
+        stop_watching_action = QAction("Stop Watching Battle Logs", self)
+        stop_watching_action.setStatusTip("Stop Watching Battle Logs")
+        stop_watching_action.triggered.connect(self.stop_watching_battle_logs)
+        tools_menu.addAction(stop_watching_action)
+
+        self.log_watcher = None
+        self.watched_battles = {}
+        self.watch_timer = QTimer(self, interval=WATCH_INTERVAL_MS)
+        self.watch_timer.timeout.connect(self.poll_battle_logs)
+
         # Place the primay widget within the MainWindow
         self.central_widget = QWidget(self)
         # set the grid layout
@@ -162,6 +258,7 @@ class MainWindow(QMainWindow):
         self.central_widget.setLayout(self.central_widget.layout)
 
         self.opposing_pokemon = []
+        self.last_opposing_pokemon = []
         self.opposing_pokemon_images = [QLabel()] * TEAM_SIZE
         self.opposing_pokemon_entry = [QLineEdit()] * TEAM_SIZE
         self.your_checked_pokemon = []
@@ -255,14 +352,14 @@ class MainWindow(QMainWindow):
             TEAM_SIZE // 2,
             alignment=Qt.AlignmentFlag.AlignCenter,
         )
-        self.most_likely = QLabel(self)
+        self.most_likely = RankedResultsModel(sprite_path, parent=self)
+        self.most_likely_view = RankedResultsView(self.most_likely, parent=self)
         self.central_widget.layout.addWidget(
-            self.most_likely,
+            self.most_likely_view,
             8,
             0,
             3,
             TEAM_SIZE // 2,
-            alignment=Qt.AlignmentFlag.AlignCenter,
         )
 
         self.central_widget.layout.addWidget(
@@ -276,23 +373,69 @@ class MainWindow(QMainWindow):
             TEAM_SIZE // 2,
             alignment=Qt.AlignmentFlag.AlignCenter,
         )
-        self.most_disproportionate = QLabel(self)
+        self.most_disproportionate = RankedResultsModel(sprite_path, parent=self)
+        self.most_disproportionate_view = RankedResultsView(
+            self.most_disproportionate, parent=self
+        )
+        # Interval columns are only shown while intervals are turned on
+        for view in (self.most_likely_view, self.most_disproportionate_view):
+            view.setColumnHidden(3, True)
         self.central_widget.layout.addWidget(
-            self.most_disproportionate,
+            self.most_disproportionate_view,
             8,
             3,
             3,
             TEAM_SIZE // 2,
-            alignment=Qt.AlignmentFlag.AlignCenter,
         )
 
-        self.setCentralWidget(self.central_widget)
+        self.lookahead_title = QLabel(
+            "Most Informative Next Reveals\n(% Chance to see, % of ranking shifted if revealed)",
+            alignment=Qt.AlignmentFlag.AlignCenter,
+        )
+        self.central_widget.layout.addWidget(
+            self.lookahead_title,
+            11,
+            0,
+            1,
+            TEAM_SIZE,
+            alignment=Qt.AlignmentFlag.AlignCenter,
+        )
+        self.lookahead = QLabel(self)
+        self.central_widget.layout.addWidget(
+            self.lookahead,
+            12,
+            0,
+            3,
+            TEAM_SIZE,
+            alignment=Qt.AlignmentFlag.AlignCenter,
+        )
+        self.lookahead_title.setVisible(False)
+        self.lookahead.setVisible(False)
+
+        # Each tab is one battle, all sharing the same loaded format
+        self.battles = [BattleState()]
+        self.current_battle = self.battles[0]
+        self.battle_count = 1
+        self.battle_tabs = QTabBar(self, tabsClosable=True, expanding=False)
+        self.battle_tabs.addTab("Battle 1")
+        self.battle_tabs.currentChanged.connect(self.switch_battle)
+        self.battle_tabs.tabCloseRequested.connect(self.close_battle)
+
+        main_widget = QWidget(self)
+        main_layout = QVBoxLayout(main_widget)
+        main_layout.addWidget(self.battle_tabs)
+        main_layout.addWidget(self.central_widget)
+        self.setCentralWidget(main_widget)
 
         # show the window
         self.show()
 
         # Require a format selection upon openeing
-        self.counts = None
+        self.format_model = None
+        if initial_format is not None:
+            # Skips the dialog, e.g. for scripted sessions
+            self.set_format(*initial_format)
+            return
         try:
             self.select_format(check_default=True)
         except ValueError as e:
@@ -345,12 +488,7 @@ class MainWindow(QMainWindow):
                 # If the default format is invalid, delete it and pretend it doesn't exist
                 self.delete_default_format()
             else:
-                self.reset()
-                self.counts, self.raw_rates, self.teammates, self.checks = (
-                    self.load_data(
-                        generation=generation, tier=tier, elo_cutoff=elo_floor
-                    )
-                )
+                self.set_format(generation, tier, elo_floor)
                 return generation, tier, elo_floor
 
         # Popup the dialog box to select the format
@@ -367,19 +505,27 @@ class MainWindow(QMainWindow):
             except IndexError:
                 raise ValueError(f"Format Gen{generation} {tier}-{elo_floor} not found")
 
-            self.reset()
-            # Load the data into the class so it can be referenced
-            self.counts, self.raw_rates, self.teammates, self.checks = self.load_data(
-                generation=generation, tier=tier, elo_cutoff=elo_floor
-            )
+            self.set_format(generation, tier, elo_floor)
             return generation, tier, elo_floor
         else:
             # Don't need this if a generation already exists
-            if self.counts is None:
+            if self.format_model is None:
                 raise ValueError("A format must be selected")
             else:
                 return None, None, None
 
+    def set_format(self, generation, tier, elo_floor):
+        # Battles in other tabs were entered against the old format
+        for battle in self.battles:
+            battle.reset()
+        self.reset()
+        # Load the data into the class so it can be referenced
+        self.format_model = FormatModel(
+            *self.load_data(generation=generation, tier=tier, elo_cutoff=elo_floor)
+        )
+        self.current_format = (generation, tier, elo_floor)
+        self.update_interval_columns()
+
     def load_data(self, generation, tier, elo_cutoff):
         format = f"gen{generation}{tier}-{elo_cutoff}"
 
@@ -397,6 +543,17 @@ class MainWindow(QMainWindow):
         counts = dfb.add_lead_information(leads, raw_counts)
         teammates = dfb.get_teammates_df(chaos)
         checks = dfb.get_checks_df(chaos)
+        check_deviations = dfb.get_check_deviations_df(chaos)
+        if self.low_rank_action.isChecked():
+            teammates = factorize_teammates(teammates)
+            report = teammates.report
+            self.statusBar().showMessage(
+                f"Low-rank teammate model: rank {report['rank']}, "
+                f"{report['size_ratio']:.1%} of full size, "
+                f"{report['reconstruction_error']:.1%} reconstruction error, "
+                f"{report['top_overlap']:.1%} top 10 agreement, "
+                f"{report['max_abs_error']:.2%} max likelihood error"
+            )
 
         # Update the value to this new format
         self.valid_pokemon = QCompleter(
@@ -410,7 +567,7 @@ class MainWindow(QMainWindow):
         ):
             pokemon_entry_field.setCompleter(self.valid_pokemon)
 
-        return counts, raw_rates, teammates, checks
+        return counts, raw_rates, teammates, checks, check_deviations
 
     # Helper functions related to the GUI
     def update_pokemon_image(self, check_text: str, index: int, whose: str = "your"):
@@ -444,7 +601,10 @@ class MainWindow(QMainWindow):
         self.your_checked_pokemon = []
         for i in range(TEAM_SIZE):
             if self.your_pokemon_checkboxes[i].isChecked():
-                if self.your_pokemon_entry[i].text() in self.teammates.columns:
+                if (
+                    self.your_pokemon_entry[i].text()
+                    in self.format_model.teammates.columns
+                ):
                     self.your_checked_pokemon.append(self.your_pokemon_entry[i].text())
 
         self.update_most_likely()
@@ -454,7 +614,10 @@ class MainWindow(QMainWindow):
     def update_opponent_team_list(self):
         self.opposing_pokemon = []
         for i in range(TEAM_SIZE):
-            if self.opposing_pokemon_entry[i].text() in self.teammates.columns:
+            if (
+                self.opposing_pokemon_entry[i].text()
+                in self.format_model.teammates.columns
+            ):
                 self.opposing_pokemon.append(self.opposing_pokemon_entry[i].text())
 
         self.update_most_likely()
@@ -472,8 +635,234 @@ class MainWindow(QMainWindow):
         for i in range(TEAM_SIZE):
             self.your_pokemon_checkboxes[i].setChecked(False)
 
-        self.most_likely.setText("")
-        self.most_disproportionate.setText("")
+        self.most_likely.clear()
+        self.most_disproportionate.clear()
+        self.lookahead.setText("")
+
+    # Helper functions related to battle tabs
+    def new_battle(self):
+        self.battle_tabs.setCurrentIndex(self.add_battle())
+
+    def add_battle(self):
+        # Adds a tab without switching to it and returns its index
+        self.battles.append(BattleState())
+        self.battle_count += 1
+        return self.battle_tabs.addTab(f"Battle {self.battle_count}")
+
+    def close_battle(self, index):
+        if len(self.battles) == 1:
+            self.reset()
+            return
+        if self.battles.pop(index) is self.current_battle:
+            # Nothing to save from a closed battle when the next tab is shown
+            self.current_battle = None
+        self.battle_tabs.removeTab(index)
+
+    def switch_battle(self, index):
+        if index < 0 or self.battles[index] is self.current_battle:
+            return
+        if self.current_battle is not None:
+            self.save_battle_state(self.current_battle)
+        self.current_battle = self.battles[index]
+        self.load_battle_state(self.current_battle)
+
+    def save_battle_state(self, battle):
+        battle.your_pokemon = [entry.text() for entry in self.your_pokemon_entry]
+        battle.your_checked = [
+            checkbox.isChecked() for checkbox in self.your_pokemon_checkboxes
+        ]
+        battle.opposing_pokemon = [
+            entry.text() for entry in self.opposing_pokemon_entry
+        ]
+        battle.result_states = (
+            self.most_likely.save_state(),
+            self.most_disproportionate.save_state(),
+        )
+        battle.last_opposing_pokemon = self.last_opposing_pokemon
+
+    def load_battle_state(self, battle):
+        # Fill every field silently then recalculate once, rather than once per field
+        fields = (
+            self.your_pokemon_entry
+            + self.opposing_pokemon_entry
+            + self.your_pokemon_checkboxes
+        )
+        for field in fields:
+            field.blockSignals(True)
+        for i in range(TEAM_SIZE):
+            self.your_pokemon_entry[i].setText(battle.your_pokemon[i])
+            self.your_pokemon_checkboxes[i].setChecked(battle.your_checked[i])
+            self.opposing_pokemon_entry[i].setText(battle.opposing_pokemon[i])
+        for field in fields:
+            field.blockSignals(False)
+
+        for i in range(TEAM_SIZE):
+            self.update_pokemon_image(battle.your_pokemon[i].lower(), i, "your")
+            self.update_pokemon_image(
+                battle.opposing_pokemon[i].lower(), i, "opponents"
+            )
+        # Reveals made while the tab was in the background (e.g. by the log watcher)
+        # are measured from the ranking it was last showing
+        self.most_likely.restore_state(battle.result_states[0])
+        self.most_disproportionate.restore_state(battle.result_states[1])
+        self.last_opposing_pokemon = battle.last_opposing_pokemon
+        self.lookahead.setText("")
+        self.opposing_pokemon = [
+            mon
+            for mon in battle.opposing_pokemon
+            if mon in self.format_model.teammates.columns
+        ]
+        # Calls update_most_likely with the restored opponent list
+        self.update_checked_list()
+
+    def toggle_low_rank(self):
+        if self.format_model is None:
+            return
+        # Reload rather than keep the full matrix around alongside the factors
+        self.format_model = FormatModel(
+            *self.load_data(*self.current_format),
+            cooccurrence=self.format_model.cooccurrence,
+        )
+        if not self.low_rank_action.isChecked():
+            self.statusBar().clearMessage()
+        self.update_most_likely()
+
+    def load_cooccurrence_index(self):
+        if self.format_model is None:
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Load Co-occurrence Index",
+            resource_path("data"),
+            "Co-occurrence index (*.npz)",
+        )
+        if path == "":
+            return
+        try:
+            cooccurrence_index = CooccurrenceIndex.load(path)
+        except (OSError, KeyError, ValueError):
+            QMessageBox.critical(self, "Critical", f"Unable to load index {path}")
+            return
+        generation, tier, _ = self.current_format
+        format_id = to_id(f"gen{generation}{tier}")
+        if cooccurrence_index.format_id != format_id:
+            QMessageBox.critical(
+                self,
+                "Critical",
+                f"Index {path} was built for "
+                f"{cooccurrence_index.format_id or 'mixed formats'}, not {format_id}. "
+                f"Rebuild it with --format-id {format_id}",
+            )
+            return
+        self.set_cooccurrence_index(cooccurrence_index)
+        self.statusBar().showMessage(
+            f"Co-occurrence index loaded ({cooccurrence_index.team_count} teams)"
+        )
+
+    def set_cooccurrence_index(self, cooccurrence_index):
+        if self.format_model is None:
+            return
+        # The format model is shared by all battles, so swap it rather than modify it
+        self.format_model = dataclasses.replace(
+            self.format_model, cooccurrence=cooccurrence_index
+        )
+        if cooccurrence_index is None:
+            self.statusBar().clearMessage()
+        self.update_interval_columns()
+        self.update_most_likely()
+
+    # Helper functions related to watching battle logs
+    def watch_battle_logs(self):
+        folder = QFileDialog.getExistingDirectory(self, "Battle Log Folder")
+        if folder == "":
+            return
+        your_name, ok = QInputDialog.getText(
+            self,
+            "Watch Battle Logs",
+            "Your Showdown username (optional, used to tell which side is yours):",
+        )
+        if not ok:
+            return
+        self.start_watching_battle_logs([folder], your_name)
+
+    def start_watching_battle_logs(self, paths, your_name=""):
+        self.log_watcher = BattleLogWatcher(paths, your_name=your_name or None)
+        self.watched_battles = {}
+        self.watch_timer.start()
+        self.statusBar().showMessage(f"Watching {', '.join(paths)}")
+
+    def stop_watching_battle_logs(self):
+        self.watch_timer.stop()
+        self.log_watcher = None
+        self.statusBar().clearMessage()
+
+    def poll_battle_logs(self):
+        events = self.log_watcher.poll()
+        for event in events:
+            battle = self.watched_battle(event.battle)
+            if event.species is None:
+                # The log moved on to a new battle
+                if battle is self.current_battle:
+                    self.clear_opponent()
+                else:
+                    battle.clear_opponent()
+            else:
+                self.add_opposing_reveal(battle, event.species)
+        if len(events) > 0:
+            self.statusBar().showMessage(
+                f"Watching battle logs ({self.log_watcher.last_lag_ms:.0f} ms behind)"
+            )
+
+    def watched_battle(self, key):
+        # Each watched battle gets its own tab, reusing the current one if it's unused.
+        # New tabs are added in the background so the tab in use is never switched
+        battle = self.watched_battles.get(key)
+        if battle is not None and any(
+            battle is tab_battle for tab_battle in self.battles
+        ):
+            return battle
+        self.save_battle_state(self.current_battle)
+        index = self.battle_tabs.currentIndex()
+        if self.current_battle != BattleState() or any(
+            self.current_battle is watched for watched in self.watched_battles.values()
+        ):
+            index = self.add_battle()
+        self.battle_tabs.setTabText(index, os.path.basename(key))
+        self.watched_battles[key] = self.battles[index]
+        return self.battles[index]
+
+    def add_opposing_reveal(self, battle, species):
+        if battle is self.current_battle:
+            revealed = [entry.text() for entry in self.opposing_pokemon_entry]
+        else:
+            revealed = battle.opposing_pokemon
+        if species in revealed or "" not in revealed:
+            return
+        if battle is self.current_battle:
+            # Goes through the same signals as typing the name in
+            self.opposing_pokemon_entry[revealed.index("")].setText(species)
+        else:
+            # Shown when the tab is next switched to
+            battle.opposing_pokemon[revealed.index("")] = species
+
+    def toggle_intervals(self):
+        self.update_interval_columns()
+        self.update_most_likely()
+
+    def update_interval_columns(self):
+        # Intervals are bootstrapped from the pairwise data, so they don't describe a
+        # ranking from a co-occurrence index and are hidden while one is loaded
+        available = self.format_model is None or self.format_model.cooccurrence is None
+        self.intervals_action.setEnabled(available)
+        for view in (self.most_likely_view, self.most_disproportionate_view):
+            view.setColumnHidden(
+                3, not (available and self.intervals_action.isChecked())
+            )
+
+    def toggle_lookahead(self, checked):
+        self.lookahead_title.setVisible(checked)
+        self.lookahead.setVisible(checked)
+        self.update_most_likely()
 
     def set_default_format(self):
         try:
@@ -492,45 +881,98 @@ class MainWindow(QMainWindow):
 
     # Helper functions related to calculations
     def update_most_likely(self):
+        # Deltas in the results are measured from the last reveal
+        new_reveal = self.opposing_pokemon != self.last_opposing_pokemon
+        self.last_opposing_pokemon = self.opposing_pokemon
+
         if len(self.opposing_pokemon) == 0:
+            self.most_likely.clear()
+            self.most_disproportionate.clear()
+            self.lookahead.setText("")
             return
 
         if len(self.opposing_pokemon) == TEAM_SIZE:
-            self.most_likely.setText("No Hidden Pokemon")
-            self.most_disproportionate.setText("No Hidden Pokemon")
+            self.most_likely.set_message("No Hidden Pokemon")
+            self.most_disproportionate.set_message("No Hidden Pokemon")
+            self.lookahead.setText("")
             return
 
         try:
             display_likelihood, disproportionality = calculate_likelihoods(
-                self.teammates,
-                self.counts,
-                self.checks,
-                self.raw_rates,
+                self.format_model.teammates,
+                self.format_model.counts,
+                self.format_model.checks,
+                self.format_model.raw_rates,
                 self.opposing_pokemon,
                 self.your_checked_pokemon,
+                cooccurrence_index=self.format_model.cooccurrence,
             )
         except KeyError:
-            self.most_likely.setText("Invalid Pokemon Present")
-            self.most_disproportionate.setText("Invalid Pokemon Present")
+            self.most_likely.set_message("Invalid Pokemon Present")
+            self.most_disproportionate.set_message("Invalid Pokemon Present")
+            self.lookahead.setText("")
         else:
-            # Update the text boxes with the results
-            self.most_likely.setText(
-                (display_likelihood.sort_values(ascending=False).iloc[:10] * 100)
-                .round(3)
-                .to_string()
-                .replace("\n", " %\n")
-                + " %"
+            likelihood_intervals = disproportionality_intervals = None
+            if self.intervals_action.isEnabled() and self.intervals_action.isChecked():
+                likelihood_intervals, disproportionality_intervals = (
+                    calculate_likelihood_intervals(
+                        self.format_model.teammates,
+                        self.format_model.counts,
+                        self.format_model.checks,
+                        self.format_model.check_deviations,
+                        self.format_model.raw_rates,
+                        self.opposing_pokemon,
+                        self.your_checked_pokemon,
+                    )
+                )
+            # Update the ranked tables with the results
+            self.most_likely.set_values(
+                display_likelihood, new_reveal, likelihood_intervals
             )
-            self.most_disproportionate.setText(
-                (disproportionality.sort_values(ascending=False).iloc[:10] * 100)
-                .round(3)
-                .to_string()
-                .replace("\n", " %\n")
-                + " %"
+            self.most_disproportionate.set_values(
+                disproportionality, new_reveal, disproportionality_intervals
             )
+            if self.lookahead_action.isChecked():
+                self.update_lookahead(display_likelihood)
 
         return
 
+    def update_lookahead(self, display_likelihood):
+        # Revealing the last hidden pokemon leaves nothing to predict
+        if len(self.opposing_pokemon) >= TEAM_SIZE - 1:
+            self.lookahead.setText("")
+            return
+
+        if self.format_model.cooccurrence is not None:
+            # The lookahead only uses the pairwise data, so compare it against the
+            # pairwise ranking, otherwise the shifts measure the gap between the models
+            display_likelihood, _ = calculate_likelihoods(
+                self.format_model.teammates,
+                self.format_model.counts,
+                self.format_model.checks,
+                self.format_model.raw_rates,
+                self.opposing_pokemon,
+                self.your_checked_pokemon,
+            )
+        lookahead_likelihood = calculate_lookahead_likelihoods(
+            self.format_model.teammates,
+            self.format_model.counts,
+            self.format_model.checks,
+            self.opposing_pokemon,
+            self.your_checked_pokemon,
+        )
+        summary = summarize_lookahead(display_likelihood, lookahead_likelihood)
+
+        lines = []
+        for candidate, row in summary.iterrows():
+            line = f"{candidate}: {row['Likelihood'] * 100:.3f} %, {row['Shift'] * 100:.1f} % shift"
+            if len(row["Rises"]) > 0:
+                line += f"  \u2191 {', '.join(row['Rises'])}"
+            if len(row["Drops"]) > 0:
+                line += f"  \u2193 {', '.join(row['Drops'])}"
+            lines.append(line)
+        self.lookahead.setText("\n".join(lines))
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)